@@ -4,89 +4,278 @@
 Testa performance atual vs otimizada
 """
 
+import asyncio
+import os
+import shutil
+import statistics
 import time
-import subprocess
 import psutil
 import json
+from collections import deque
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # orjson é opcional; usa json da stdlib
+    orjson = None
+
 class OllamaBenchmark:
-    def __init__(self):
+    def __init__(self, sampling_interval_s=None, profiling_enabled=None):
         self.results = {}
         self.start_time = None
         
-    def get_system_info(self):
-        """Coleta informações do sistema"""
-        try:
-            # CPU info
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            
+        # Profiler configurável via env: MAESTRO_PROFILE=0 desliga,
+        # MAESTRO_PROFILE_INTERVAL_MS define o intervalo de CPU (0 = desligado)
+        if sampling_interval_s is None:
+            sampling_interval_s = float(os.environ.get("MAESTRO_PROFILE_INTERVAL_MS", "100")) / 1000
+        if profiling_enabled is None:
+            profiling_enabled = os.environ.get("MAESTRO_PROFILE", "1") != "0"
+        self.sampling_interval_s = sampling_interval_s
+        self.profiling_enabled = profiling_enabled and sampling_interval_s > 0
+        
+        # Intervalo de amostragem por classe de métrica (segundos);
+        # None = coletado uma única vez
+        self._sampler_config = {
+            "cpu": sampling_interval_s,
+            "mem": max(1.0, sampling_interval_s),
+            "proc": sampling_interval_s,
+            "static": None
+        }
+        
+        # Amostras recentes coletadas pelos samplers em background
+        self._cpu_samples = deque(maxlen=128)
+        self._memory_samples = deque(maxlen=128)
+        self._process_samples = deque(maxlen=128)
+        self._sampler_tasks = []
+        
+        # Processos do ollama em execução, monitorados pelo sampler
+        self._watched_processes = {}
+        
+        # Disponibilidade do Ollama (verificada uma única vez)
+        self._ollama_running = None
+        
+        self._static_info = None
+        if self.profiling_enabled:
+            # Primeira chamada só inicializa o contador interno do psutil
+            psutil.cpu_percent(interval=None)
+            self._static_info = self._snapshot_static()
+        
+    def _snapshot_static(self):
+        """Informações que não mudam durante a execução"""
+        return {
+            "memory_total": psutil.virtual_memory().total,
             # GPU info (simplificado para M3)
-            gpu_info = {
+            "gpu_info": {
                 "chip": "Apple M3",
                 "memory": "8GB Unified",
                 "neural_engine": "Available"
             }
+        }
+    
+    def _sample_cpu(self):
+        self._cpu_samples.append(psutil.cpu_percent(interval=None))
+    
+    def _sample_mem(self):
+        self._memory_samples.append(psutil.virtual_memory())
+    
+    def _sample_processes(self):
+        """Amostra os processos do ollama com leituras do /proc agrupadas"""
+        if not self._watched_processes:
+            return
+        sample = {"cpu_percent": 0.0, "rss_bytes": 0, "thread_count": 0, "fd_count": 0}
+        for pid, proc in list(self._watched_processes.items()):
+            try:
+                with proc.oneshot():
+                    sample["cpu_percent"] += proc.cpu_percent()
+                    sample["rss_bytes"] += proc.memory_info().rss
+                    sample["thread_count"] += proc.num_threads()
+                    if hasattr(proc, "num_fds"):
+                        sample["fd_count"] += proc.num_fds()
+            except psutil.Error:
+                self._watched_processes.pop(pid, None)
+        self._process_samples.append(sample)
+    
+    def _watch_process(self, pid):
+        if self.profiling_enabled:
+            try:
+                self._watched_processes[pid] = psutil.Process(pid)
+            except psutil.Error:
+                pass
+    
+    def _unwatch_process(self, pid):
+        self._watched_processes.pop(pid, None)
+    
+    async def _sample_every(self, sample, interval):
+        """Executa um sampler periodicamente sem bloquear o event loop"""
+        while True:
+            sample()
+            await asyncio.sleep(interval)
+    
+    def start_sampler(self):
+        """Inicia os samplers de métricas em background"""
+        if self.profiling_enabled and not self._sampler_tasks:
+            samplers = {
+                "cpu": self._sample_cpu,
+                "mem": self._sample_mem,
+                "proc": self._sample_processes
+            }
+            for metric, sample in samplers.items():
+                interval = self._sampler_config[metric]
+                self._sampler_tasks.append(asyncio.create_task(self._sample_every(sample, interval)))
+    
+    async def stop_sampler(self):
+        """Para os samplers de métricas"""
+        for task in self._sampler_tasks:
+            task.cancel()
+        await asyncio.gather(*self._sampler_tasks, return_exceptions=True)
+        self._sampler_tasks = []
+    
+    def reset_samples(self):
+        """Descarta amostras anteriores para iniciar uma nova janela"""
+        self._cpu_samples.clear()
+        self._memory_samples.clear()
+        self._process_samples.clear()
+        
+    def get_system_info(self):
+        """Coleta informações do sistema"""
+        if not self.profiling_enabled:
+            return {}
+        try:
+            # CPU info: média da janela do sampler (leitura instantânea se vazia)
+            if self._cpu_samples:
+                cpu_percent = statistics.mean(self._cpu_samples)
+            else:
+                cpu_percent = psutil.cpu_percent(interval=None)
+            if self._memory_samples:
+                memory = self._memory_samples[-1]
+            else:
+                memory = psutil.virtual_memory()
+            memory_peak = max((m.percent for m in self._memory_samples), default=memory.percent)
+            
+            # Métricas dos processos do ollama durante a janela
+            process_info = None
+            if self._process_samples:
+                process_info = {
+                    "cpu_percent": statistics.mean(p["cpu_percent"] for p in self._process_samples),
+                    "rss_peak_bytes": max(p["rss_bytes"] for p in self._process_samples),
+                    "thread_count": self._process_samples[-1]["thread_count"],
+                    "fd_count": self._process_samples[-1]["fd_count"]
+                }
             
             return {
                 "cpu_percent": cpu_percent,
-                "memory_total": memory.total,
+                "memory_total": self._static_info["memory_total"],
                 "memory_available": memory.available,
                 "memory_percent": memory.percent,
-                "gpu_info": gpu_info
+                "memory_peak_percent": memory_peak,
+                "samples": len(self._cpu_samples),
+                "process": process_info,
+                "gpu_info": self._static_info["gpu_info"]
             }
         except Exception as e:
             return {"error": str(e)}
     
-    def test_ollama_response(self, prompt="Write a simple Python function to calculate fibonacci numbers", model="qwen3-coder:7b"):
+    async def test_ollama_response(self, prompt="Write a simple Python function to calculate fibonacci numbers", model="qwen3-coder:7b"):
         """Testa tempo de resposta do Ollama"""
         try:
-            start_time = time.time()
+            start_ns = time.perf_counter_ns()
             
             # Comando para testar resposta
-            cmd = ["ollama", "run", model, prompt]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+            proc = await asyncio.create_subprocess_exec(
+                "ollama", "run", model, prompt,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            self._watch_process(proc.pid)
             
-            end_time = time.time()
-            response_time = end_time - start_time
+            # Conta a saída conforme chega, sem acumular a resposta inteira
+            output_length = 0
+            first_token_ns = None
+            
+            async def consume_stdout():
+                nonlocal output_length, first_token_ns
+                while True:
+                    chunk = await proc.stdout.read(4096)
+                    if not chunk:
+                        break
+                    if first_token_ns is None:
+                        first_token_ns = time.perf_counter_ns()
+                    output_length += len(chunk)
+            
+            try:
+                _, stderr, _ = await asyncio.wait_for(
+                    asyncio.gather(consume_stdout(), proc.stderr.read(), proc.wait()),
+                    timeout=60
+                )
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                return {
+                    "success": False,
+                    "response_time": 60,
+                    "time_to_first_token": None,
+                    "output_length": output_length,
+                    "throughput_bytes_per_s": None,
+                    "error": "Timeout after 60 seconds"
+                }
+            finally:
+                self._unwatch_process(proc.pid)
+            
+            end_ns = time.perf_counter_ns()
+            response_time = (end_ns - start_ns) / 1e9
+            
+            time_to_first_token = None
+            throughput = None
+            if first_token_ns is not None:
+                time_to_first_token = (first_token_ns - start_ns) / 1e9
+                generation_time = (end_ns - first_token_ns) / 1e9
+                if generation_time > 0:
+                    throughput = output_length / generation_time
             
             return {
-                "success": result.returncode == 0,
+                "success": proc.returncode == 0,
                 "response_time": response_time,
-                "output_length": len(result.stdout),
-                "error": result.stderr if result.returncode != 0 else None
-            }
-        except subprocess.TimeoutExpired:
-            return {
-                "success": False,
-                "response_time": 60,
-                "output_length": 0,
-                "error": "Timeout after 60 seconds"
+                "time_to_first_token": time_to_first_token,
+                "output_length": output_length,
+                "throughput_bytes_per_s": throughput,
+                "error": stderr.decode(errors="replace") if proc.returncode != 0 else None
             }
         except Exception as e:
             return {
                 "success": False,
                 "response_time": 0,
+                "time_to_first_token": None,
                 "output_length": 0,
+                "throughput_bytes_per_s": None,
                 "error": str(e)
             }
     
-    def benchmark_current_config(self):
+    async def test_ollama_responses(self, prompts, model="qwen3-coder:7b"):
+        """Testa vários prompts em paralelo"""
+        return await asyncio.gather(*[self.test_ollama_response(p, model) for p in prompts])
+    
+    async def benchmark_current_config(self):
         """Benchmark da configuração atual"""
         print("🔍 Testando configuração atual...")
         
-        # Info do sistema antes
-        system_before = self.get_system_info()
-        
-        # Teste de resposta
-        response_test = self.test_ollama_response()
-        
-        # Info do sistema depois
-        system_after = self.get_system_info()
+        self.start_sampler()
+        try:
+            # Info do sistema antes
+            if self.profiling_enabled:
+                await asyncio.sleep(self._sampler_config["cpu"])
+            system_before = self.get_system_info()
+            self.reset_samples()
+            
+            # Teste de resposta
+            response_test = await self.test_ollama_response()
+            
+            # Info do sistema depois (média durante o teste)
+            system_after = self.get_system_info()
+        finally:
+            await self.stop_sampler()
         
         self.results["current"] = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "system_before": system_before,
             "system_after": system_after,
             "response_test": response_test
@@ -94,32 +283,41 @@ class OllamaBenchmark:
         
         return self.results["current"]
     
-    def get_ollama_config(self):
+    async def get_ollama_config(self):
         """Obtém configuração atual do Ollama"""
         try:
             # Verifica variáveis de ambiente
             config = {}
             
-            # Testa se ollama está rodando
-            result = subprocess.run(["ollama", "list"], capture_output=True, text=True)
-            config["ollama_running"] = result.returncode == 0
+            # Testa se ollama está rodando (cacheado entre relatórios)
+            if self._ollama_running is None:
+                if shutil.which("ollama") is None:
+                    self._ollama_running = False
+                else:
+                    proc = await asyncio.create_subprocess_exec(
+                        "ollama", "list",
+                        stdout=asyncio.subprocess.DEVNULL,
+                        stderr=asyncio.subprocess.DEVNULL
+                    )
+                    self._ollama_running = await proc.wait() == 0
+            config["ollama_running"] = self._ollama_running
             
             # Verifica variáveis de ambiente
             env_vars = ["OLLAMA_FLASH_ATTENTION", "OLLAMA_LLM_LIBRARY", "OLLAMA_GPU_OVERHEAD"]
             for var in env_vars:
-                config[var] = subprocess.run(["echo", f"${var}"], capture_output=True, text=True).stdout.strip()
+                config[var] = os.environ.get(var, "")
             
             return config
         except Exception as e:
             return {"error": str(e)}
     
-    def generate_report(self):
+    async def generate_report(self):
         """Gera relatório completo"""
         print("\n📊 RELATÓRIO DE PERFORMANCE OLLAMA M3")
         print("=" * 50)
         
         # Configuração atual
-        config = self.get_ollama_config()
+        config = await self.get_ollama_config()
         print(f"\n🔧 Configuração Atual:")
         print(f"   Ollama Running: {config.get('ollama_running', 'Unknown')}")
         print(f"   Flash Attention: {config.get('OLLAMA_FLASH_ATTENTION', 'Not set')}")
@@ -132,7 +330,11 @@ class OllamaBenchmark:
             print(f"\n⚡ Performance Atual:")
             print(f"   Response Time: {current['response_test']['response_time']:.2f}s")
             print(f"   Success: {current['response_test']['success']}")
-            print(f"   Output Length: {current['response_test']['output_length']} chars")
+            if current['response_test']['time_to_first_token'] is not None:
+                print(f"   Time to First Token: {current['response_test']['time_to_first_token']:.2f}s")
+            print(f"   Output Length: {current['response_test']['output_length']} bytes")
+            if current['response_test']['throughput_bytes_per_s'] is not None:
+                print(f"   Throughput: {current['response_test']['throughput_bytes_per_s']:.0f} bytes/s")
             
             if current['response_test']['error']:
                 print(f"   Error: {current['response_test']['error']}")
@@ -152,7 +354,16 @@ class OllamaBenchmark:
         
         return self.results
 
-def main():
+def save_results(report, path):
+    """Salva resultados em JSON (orjson quando disponível)"""
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, default=datetime.isoformat)
+
+async def main():
     """Função principal"""
     print("🚀 Ollama Performance Benchmark for Mac M3")
     print("=" * 50)
@@ -160,16 +371,15 @@ def main():
     benchmark = OllamaBenchmark()
     
     # Testa configuração atual
-    current_results = benchmark.benchmark_current_config()
+    current_results = await benchmark.benchmark_current_config()
     
     # Gera relatório
-    report = benchmark.generate_report()
+    report = await benchmark.generate_report()
     
     # Salva resultados
-    with open("ollama_benchmark_results.json", "w") as f:
-        json.dump(report, f, indent=2)
+    save_results(report, "ollama_benchmark_results.json")
     
     print(f"\n✅ Resultados salvos em: ollama_benchmark_results.json")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -7,6 +7,7 @@ Simulates orchestrator execution with realistic timing and updates.
 import asyncio
 import json
 import random
+import sys
 import time
 from datetime import datetime
 from typing import Dict
@@ -15,6 +16,19 @@ import websockets
 from websockets.client import WebSocketClientProtocol
 
 
+# Pipeline stages with realistic timing: (name, description, min_time, max_time)
+STAGES = tuple(
+    (sys.intern(name), description, min_time, max_time)
+    for name, description, min_time, max_time in [
+        ("planner", "Planning with Gemini CLI", 8, 15),
+        ("coder", "Code generation with Codex CLI", 12, 25),
+        ("integrator", "Integration with Cursor CLI", 6, 12),
+        ("tester", "Testing and QA validation", 10, 20),
+        ("reporter", "Generating QA report", 3, 8)
+    ]
+)
+
+
 class DashboardDemo:
     """Demo class to simulate orchestrator execution for dashboard showcase."""
     
@@ -51,15 +65,6 @@ class DashboardDemo:
         """Simulate a complete pipeline execution with realistic timing."""
         print("🎭 Starting Maestro Dashboard Demo...")
         
-        # Pipeline stages with realistic timing
-        stages = [
-            ("planner", "Planning with Gemini CLI", 8, 15),
-            ("coder", "Code generation with Codex CLI", 12, 25),
-            ("integrator", "Integration with Cursor CLI", 6, 12),
-            ("tester", "Testing and QA validation", 10, 20),
-            ("reporter", "Generating QA report", 3, 8)
-        ]
-        
         # Notify pipeline start
         await self.send_message({
             "type": "pipeline_start",
@@ -69,12 +74,12 @@ class DashboardDemo:
         
         print(f"🚀 Starting pipeline for task: {self.current_task}")
         
-        total_start_time = time.time()
+        total_start_ns = time.perf_counter_ns()
         
-        for stage_name, description, min_time, max_time in stages:
+        for stage_name, description, min_time, max_time in STAGES:
             await self.simulate_stage(stage_name, description, min_time, max_time)
             
-        total_time = int(time.time() - total_start_time)
+        total_time = int((time.perf_counter_ns() - total_start_ns) / 1e9)
         
         # Send final metrics
         await self.send_message({
@@ -113,34 +118,39 @@ class DashboardDemo:
         # Simulate progress updates
         execution_time = random.randint(min_time, max_time)
         progress_steps = [0, 25, 50, 75, 100]
-        
-        for i, progress in enumerate(progress_steps):
-            if i < len(progress_steps) - 1:
-                # Send progress update
+        step_time = execution_time / len(progress_steps)
+        
+        # Draw the stage's log messages up front instead of per tick
+        log_messages = (
+            f"Processing {description.lower()}...",
+            f"Validating {stage_name} outputs...",
+            f"Checking {stage_name} dependencies...",
+            f"Optimizing {stage_name} performance..."
+        )
+        ticks = len(progress_steps) - 1
+        log_gates = random.choices((True, False), weights=(3, 7), k=ticks)  # 30% chance of log message
+        log_picks = random.choices(log_messages, k=ticks)
+        
+        for progress, emit_log, log_message in zip(progress_steps, log_gates, log_picks):
+            # Send progress update
+            await self.send_message({
+                "type": "stage_progress",
+                "stage": stage_name,
+                "progress": f"{progress}%",
+                "timestamp": datetime.now().isoformat()
+            })
+            
+            # Simulate work
+            await asyncio.sleep(step_time)
+            
+            # Add some log messages
+            if emit_log:
                 await self.send_message({
-                    "type": "stage_progress",
-                    "stage": stage_name,
-                    "progress": f"{progress}%",
+                    "type": "log",
+                    "level": "INFO",
+                    "message": log_message,
                     "timestamp": datetime.now().isoformat()
                 })
-                
-                # Simulate work
-                await asyncio.sleep(execution_time / len(progress_steps))
-                
-                # Add some log messages
-                if random.random() < 0.3:  # 30% chance of log message
-                    log_messages = [
-                        f"Processing {description.lower()}...",
-                        f"Validating {stage_name} outputs...",
-                        f"Checking {stage_name} dependencies...",
-                        f"Optimizing {stage_name} performance..."
-                    ]
-                    await self.send_message({
-                        "type": "log",
-                        "level": "INFO",
-                        "message": random.choice(log_messages),
-                        "timestamp": datetime.now().isoformat()
-                    })
         
         # Stage completion
         success = random.random() > 0.1  # 90% success rate
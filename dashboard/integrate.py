@@ -8,7 +8,10 @@ import asyncio
 import json
 import logging
 import os
+import re
+import sys
 import time
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Optional
@@ -16,69 +19,215 @@ from typing import Dict, Optional
 import websockets
 from websockets.client import WebSocketClientProtocol
 
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Events emitted within this window are coalesced into one "batch" frame
+BATCH_MAX_EVENTS = 64
+BATCH_WINDOW_S = 0.02
+
+# Events kept while the dashboard is unreachable (oldest dropped first)
+BACKLOG_MAX_EVENTS = 1000
+
+# Orchestrator stages: (dashboard node name, make target). The tester runs
+# pipeline-test, the target the Makefile's `all` pipeline uses, rather than
+# the developer `test` target.
+STAGES = tuple(
+    (sys.intern(stage_name), stage_command)
+    for stage_name, stage_command in [
+        ("planner", "plan"),
+        ("coder", "code"),
+        ("integrator", "integrate"),
+        ("tester", "pipeline-test"),
+        ("reporter", "report")
+    ]
+)
+
+# Progress markers such as "42%" in stage output
+PROGRESS_PATTERN = re.compile(rb"\b(\d{1,3})%")
+
+
+# json.dumps(..., default=...) builds a new encoder per call; reuse one
+_FALLBACK_ENCODER = json.JSONEncoder(default=datetime.isoformat)
+
+
+def dumps_frame(frame: dict):
+    """Serialize a frame, natively encoding datetime values.
+
+    Uses orjson when installed (returns bytes, which websockets sends as-is)
+    and falls back to the stdlib encoder otherwise.
+    """
+    if orjson is not None:
+        return orjson.dumps(frame)
+    return _FALLBACK_ENCODER.encode(frame)
+
+
 class OrchestratorIntegration:
     """Integrates orchestrator execution with dashboard monitoring."""
     
-    def __init__(self, dashboard_url: str = "ws://localhost:8765", project_root: str = "."):
+    def __init__(self, dashboard_url: str = "ws://localhost:8765", project_root: str = ".",
+                 max_reconnect_attempts: int = 5):
         self.dashboard_url = dashboard_url
         self.project_root = Path(project_root)
         self.websocket: Optional[WebSocketClientProtocol] = None
         self.current_task = "demo"
         self.is_connected = False
+        self.max_reconnect_attempts = max_reconnect_attempts
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._backlog: deque = deque(maxlen=BACKLOG_MAX_EVENTS)
+        self._last_progress: Dict[str, str] = {}
+        self._tick_now: Optional[datetime] = None
         
     async def connect(self):
         """Connect to the dashboard WebSocket server."""
         try:
-            self.websocket = await websockets.connect(self.dashboard_url)
+            # Long-lived connection: keepalive pings, no per-message deflate
+            self.websocket = await websockets.connect(
+                self.dashboard_url,
+                ping_interval=20,
+                ping_timeout=20,
+                max_size=None,
+                compression=None,
+                write_limit=2**20
+            )
             self.is_connected = True
             logger.info(f"Connected to dashboard at {self.dashboard_url}")
             
             # Send initial status
-            await self.send_message({
+            await self.websocket.send(dumps_frame({
                 "type": "update_task",
                 "task": self.current_task
-            })
+            }))
+            
+            self._start_flusher()
+            
+            # Replay events buffered while disconnected
+            while self._backlog:
+                self._queue.put_nowait(self._backlog.popleft())
             
         except Exception as e:
             logger.error(f"Failed to connect to dashboard: {e}")
             self.is_connected = False
             
+    async def ensure_connected(self) -> bool:
+        """Open the dashboard connection lazily, reusing it if already open."""
+        if not self.is_connected:
+            await self.connect()
+        return self.is_connected
+        
+    async def reconnect(self) -> bool:
+        """Reconnect to the dashboard with exponential backoff."""
+        for attempt in range(self.max_reconnect_attempts):
+            await asyncio.sleep(2 ** attempt)
+            await self.connect()
+            if self.is_connected:
+                return True
+        logger.error(f"Giving up reconnecting to dashboard after {self.max_reconnect_attempts} attempts")
+        return False
+            
     async def disconnect(self):
         """Disconnect from the dashboard."""
+        if self._flusher:
+            # Drain pending events before closing the socket
+            await self._queue.join()
+            self._flusher.cancel()
+            self._flusher = None
         if self.websocket:
             await self.websocket.close()
             self.is_connected = False
             logger.info("Disconnected from dashboard")
             
-    async def send_message(self, message: dict):
-        """Send message to dashboard."""
-        if self.websocket and self.is_connected:
+    def _now(self) -> datetime:
+        """Timestamp shared by all events emitted in the same loop iteration."""
+        if self._tick_now is None:
+            self._tick_now = datetime.now()
+            asyncio.get_running_loop().call_soon(self._clear_now)
+        return self._tick_now
+        
+    def _clear_now(self):
+        self._tick_now = None
+            
+    def _start_flusher(self):
+        """Start the background task that sends batched events."""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+            
+    async def _flush_loop(self):
+        """Coalesce queued events into a single frame per batch window."""
+        loop = asyncio.get_running_loop()
+        while True:
+            events = [await self._queue.get()]
+            deadline = loop.time() + BATCH_WINDOW_S
+            while len(events) < BATCH_MAX_EVENTS:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    events.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
             try:
-                await self.websocket.send(json.dumps(message))
-            except Exception as e:
-                logger.error(f"Failed to send message to dashboard: {e}")
-                self.is_connected = False
+                if not await self._send_frame({"type": "batch", "events": events}):
+                    self._backlog.extend(events)
+            finally:
+                for _ in events:
+                    self._queue.task_done()
+                    
+    async def _send_frame(self, frame: dict) -> bool:
+        """Send one frame to the dashboard, reconnecting if the link dropped."""
+        if not self.is_connected:
+            return False
+        try:
+            await self.websocket.send(dumps_frame(frame))
+            return True
+        except websockets.exceptions.ConnectionClosed:
+            logger.warning("Dashboard connection closed, reconnecting")
+            self.is_connected = False
+            if await self.reconnect():
+                return await self._send_frame(frame)
+        except Exception as e:
+            logger.error(f"Failed to send message to dashboard: {e}")
+            self.is_connected = False
+        return False
+                
+    async def send_message(self, message: dict):
+        """Queue message for the next batched frame to the dashboard."""
+        if not self.is_connected or self._queue is None:
+            # Keep the most recent events until the dashboard is back
+            self._backlog.append(message)
+            return
+        self._queue.put_nowait(message)
                 
     async def notify_stage_start(self, stage: str, task: str):
         """Notify dashboard that a stage has started."""
+        self._last_progress.pop(stage, None)
         await self.send_message({
             "type": "stage_start",
             "stage": stage,
             "task": task,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": self._now()
         })
         
     async def notify_stage_progress(self, stage: str, progress: str):
         """Notify dashboard of stage progress."""
+        # Skip repeats of the last value reported for this stage
+        if self._last_progress.get(stage) == progress:
+            return
+        self._last_progress[stage] = progress
         await self.send_message({
             "type": "stage_progress",
             "stage": stage,
             "progress": progress,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": self._now()
         })
         
     async def notify_stage_complete(self, stage: str, success: bool, error: Optional[str] = None):
@@ -89,7 +238,7 @@ class OrchestratorIntegration:
             "stage": stage,
             "status": status,
             "error": error,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": self._now()
         })
         
     async def notify_pipeline_start(self, task: str):
@@ -98,7 +247,7 @@ class OrchestratorIntegration:
         await self.send_message({
             "type": "pipeline_start",
             "task": task,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": self._now()
         })
         
     async def notify_pipeline_complete(self, task: str, success: bool):
@@ -107,7 +256,7 @@ class OrchestratorIntegration:
             "type": "pipeline_complete",
             "task": task,
             "success": success,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": self._now()
         })
         
     async def send_metrics(self, metrics: Dict):
@@ -115,7 +264,7 @@ class OrchestratorIntegration:
         await self.send_message({
             "type": "metrics_update",
             "metrics": metrics,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": self._now()
         })
         
     async def send_log(self, level: str, message: str):
@@ -124,7 +273,7 @@ class OrchestratorIntegration:
             "type": "log",
             "level": level,
             "message": message,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": self._now()
         })
 
 
@@ -136,21 +285,16 @@ class OrchestratorWrapper:
         
     async def run_orchestrator(self, task: str):
         """Run the orchestrator with dashboard integration."""
+        # Reuse the open dashboard connection across runs
+        await self.integration.ensure_connected()
+        
         try:
             # Notify pipeline start
             await self.integration.notify_pipeline_start(task)
             await self.integration.send_log("INFO", f"Starting orchestrator for task: {task}")
             
-            # Import and run orchestrator stages
-            stages = [
-                ("planner", "plan"),
-                ("coder", "code"), 
-                ("integrator", "integrate"),
-                ("tester", "test"),
-                ("reporter", "report")
-            ]
-            
-            for stage_name, stage_command in stages:
+            # Run orchestrator stages
+            for stage_name, stage_command in STAGES:
                 await self.run_stage(stage_name, stage_command, task)
                 
             # Notify pipeline completion
@@ -169,10 +313,37 @@ class OrchestratorWrapper:
             await self.integration.notify_stage_start(stage_name, task)
             await self.integration.send_log("INFO", f"Starting {stage_name} stage")
             
-            # Simulate stage execution with progress updates
-            for progress in ["0%", "25%", "50%", "75%", "100%"]:
-                await self.integration.notify_stage_progress(stage_name, progress)
-                await asyncio.sleep(1)  # Simulate work
+            # Run the make target, deriving progress from its output
+            await self.integration.notify_stage_progress(stage_name, "0%")
+            
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    "make", f"TASK={task}", stage_command,
+                    cwd=self.integration.project_root,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT
+                )
+            except FileNotFoundError:
+                raise RuntimeError("make is not installed or not on PATH") from None
+            last_line = b""
+            async for line in proc.stdout:
+                if line.strip():
+                    last_line = line
+                match = PROGRESS_PATTERN.search(line)
+                if match:
+                    progress = f"{match.group(1).decode()}%"
+                    await self.integration.notify_stage_progress(stage_name, progress)
+                        
+            returncode = await proc.wait()
+            if returncode != 0:
+                # Targets that fail early (e.g. "No rule to make target") print no
+                # progress; their last line tells the dashboard why
+                reason = last_line.decode(errors="replace").strip()
+                raise RuntimeError(
+                    f"make {stage_command} exited with code {returncode}"
+                    + (f": {reason}" if reason else "")
+                )
+            await self.integration.notify_stage_progress(stage_name, "100%")
                 
             # Notify stage completion
             await self.integration.notify_stage_complete(stage_name, True)
@@ -190,9 +361,7 @@ async def main():
     
     try:
         # Connect to dashboard
-        await integration.connect()
-        
-        if not integration.is_connected:
+        if not await integration.ensure_connected():
             logger.error("Failed to connect to dashboard. Running without integration.")
             return
             
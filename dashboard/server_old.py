@@ -5,35 +5,147 @@ Provides real-time status updates and monitoring.
 """
 
 import asyncio
+import copy
+import functools
 import json
 import logging
 import os
 import time
+from collections import Counter, deque
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 import websockets
 from websockets.server import WebSocketServerProtocol
 
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore
+
+try:
+    import msgpack  # type: ignore
+except Exception:  # pragma: no cover - optional binary wire format
+    msgpack = None  # type: ignore
+
+try:
+    import uvloop  # type: ignore
+except Exception:  # pragma: no cover - optional, not available on Windows
+    uvloop = None  # type: ignore
+
+try:
+    from watchdog.events import FileSystemEventHandler  # type: ignore
+    from watchdog.observers import Observer  # type: ignore
+except Exception:  # pragma: no cover - optional, falls back to polling
+    FileSystemEventHandler = object  # type: ignore
+    Observer = None  # type: ignore
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Messages emitted within this window share one timestamp
+TIMESTAMP_TTL_S = 0.05
+
+# Stages whose logs/<task>.<stage>.log files are monitored
+LOG_STAGES = ("plan", "code", "integrate", "test", "report")
+
+# Initial state of every pipeline node, copied on each reset
+PIPELINE_RESET_TEMPLATE = {
+    node: {"status": "waiting", "progress": None, "error": None}
+    for node in ("planner", "coder", "integrator", "tester", "reporter")
+}
+
+# Recent lines kept per log file
+LOG_TAIL_LINES = 50
+
+# Node/log events emitted within this window go out as one "batch" frame
+BATCH_WINDOW_S = 0.05
+
+# Connection caps; clients over the limit are closed with 1013 (try again later)
+MAX_CLIENTS = int(os.getenv("DASHBOARD_MAX_CLIENTS", "256"))
+MAX_CLIENTS_PER_IP = int(os.getenv("DASHBOARD_MAX_CLIENTS_PER_IP", "16"))
+
+# "json" (text frames) or "msgpack" (binary frames, needs msgpack installed)
+WIRE_FORMAT = os.getenv("DASHBOARD_WIRE_FORMAT", "json")
+if WIRE_FORMAT == "msgpack" and msgpack is None:
+    logger.warning("DASHBOARD_WIRE_FORMAT=msgpack but msgpack isn't installed; using json")
+    WIRE_FORMAT = "json"
+
+# json.dumps(..., default=...) builds a new encoder per call; reuse one
+_FALLBACK_ENCODER = json.JSONEncoder(default=datetime.isoformat)
+
+
+def dumps_message(message: dict) -> Union[str, bytes]:
+    """Serialize a message for the browser, natively encoding datetime values.
+
+    With the default json wire format, uses orjson when installed and falls
+    back to the stdlib encoder otherwise; returns str so websockets sends a
+    text frame. With DASHBOARD_WIRE_FORMAT=msgpack, returns MessagePack bytes,
+    which websockets sends as a binary frame.
+    """
+    if WIRE_FORMAT == "msgpack":
+        return msgpack.packb(message, use_bin_type=True, default=datetime.isoformat)
+    if orjson is not None:
+        return orjson.dumps(message).decode()
+    return _FALLBACK_ENCODER.encode(message)
+
+
+def loads_message(data: Union[str, bytes]):
+    """Parse an inbound frame (text or binary) with orjson when installed.
+
+    Both parsers raise a ValueError subclass on malformed input.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    """Forwards watchdog file events from the observer thread to the loop."""
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        super().__init__()
+        self.loop = loop
+        self.queue = queue
+        
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, Path(event.src_path))
+            
+    on_created = on_modified
+    
+    def on_moved(self, event):
+        # Atomic writes land via rename
+        if not event.is_directory:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, Path(event.dest_path))
+
+
 class OrchestratorMonitor:
     """Monitors the orchestrator and provides real-time updates."""
     
+    __slots__ = (
+        "project_root",
+        "connected_clients",
+        "_clients_per_ip",
+        "current_task",
+        "pipeline_status",
+        "metrics",
+        "start_time",
+        "_ts_cache",
+        "_log_tails",
+        "_qa_cache",
+        "_pending",
+        "_flush_task",
+    )
+    
     def __init__(self, project_root: str = "."):
         self.project_root = Path(project_root)
-        self.connected_clients: List[WebSocketServerProtocol] = []
+        self.connected_clients: Set[WebSocketServerProtocol] = set()
+        self._clients_per_ip: Counter = Counter()
         self.current_task = "demo"
-        self.pipeline_status = {
-            "planner": {"status": "waiting", "progress": None, "error": None},
-            "coder": {"status": "waiting", "progress": None, "error": None},
-            "integrator": {"status": "waiting", "progress": None, "error": None},
-            "tester": {"status": "waiting", "progress": None, "error": None},
-            "reporter": {"status": "waiting", "progress": None, "error": None}
-        }
+        self.pipeline_status = copy.deepcopy(PIPELINE_RESET_TEMPLATE)
         self.metrics = {
             "totalTime": 0,
             "testsPassed": 0,
@@ -41,19 +153,45 @@ class OrchestratorMonitor:
             "filesTouched": 0
         }
         self.start_time = None
+        self._ts_cache = (0.0, datetime.now())
+        # log file -> (offset past the last full line, lines, last line is partial)
+        self._log_tails: Dict[Path, Tuple[int, deque, bool]] = {}
+        # ((mtime_ns, size), parsed qa.json) of the last read
+        self._qa_cache: Optional[Tuple[Tuple[int, int], Dict]] = None
+        self._pending: List[dict] = []
+        self._flush_task: Optional[asyncio.Task] = None
         
-    async def register_client(self, websocket: WebSocketServerProtocol):
-        """Register a new WebSocket client."""
-        self.connected_clients.append(websocket)
+    def _now(self) -> datetime:
+        """Timestamp shared by all messages of one broadcast burst."""
+        t = time.time()
+        if t - self._ts_cache[0] > TIMESTAMP_TTL_S:
+            self._ts_cache = (t, datetime.fromtimestamp(t))
+        return self._ts_cache[1]
+        
+    async def register_client(self, websocket: WebSocketServerProtocol) -> bool:
+        """Register a new WebSocket client, refusing it if over capacity."""
+        ip = websocket.remote_address[0] if websocket.remote_address else None
+        if len(self.connected_clients) >= MAX_CLIENTS or self._clients_per_ip[ip] >= MAX_CLIENTS_PER_IP:
+            logger.warning(f"Rejecting client {ip}: connection limit reached")
+            await websocket.close(1013, "overloaded")
+            return False
+            
+        self.connected_clients.add(websocket)
+        self._clients_per_ip[ip] += 1
         logger.info(f"Client connected. Total clients: {len(self.connected_clients)}")
         
         # Send current status to new client
         await self.send_status_update(websocket)
+        return True
         
     async def unregister_client(self, websocket: WebSocketServerProtocol):
         """Unregister a WebSocket client."""
         if websocket in self.connected_clients:
             self.connected_clients.remove(websocket)
+            ip = websocket.remote_address[0] if websocket.remote_address else None
+            self._clients_per_ip[ip] -= 1
+            if self._clients_per_ip[ip] <= 0:
+                del self._clients_per_ip[ip]
         logger.info(f"Client disconnected. Total clients: {len(self.connected_clients)}")
         
     async def send_to_all_clients(self, message: dict):
@@ -61,76 +199,134 @@ class OrchestratorMonitor:
         if not self.connected_clients:
             return
             
-        message_str = json.dumps(message)
-        disconnected = []
+        message_str = dumps_message(message)
+        
+        # Send to every client concurrently so a slow one doesn't hold up the rest
+        clients = tuple(self.connected_clients)
+        results = await asyncio.gather(
+            *(client.send(message_str) for client in clients),
+            return_exceptions=True
+        )
         
-        for client in self.connected_clients:
-            try:
-                await client.send(message_str)
-            except websockets.exceptions.ConnectionClosed:
-                disconnected.append(client)
-                
         # Remove disconnected clients
-        for client in disconnected:
-            await self.unregister_client(client)
+        for client, result in zip(clients, results):
+            if isinstance(result, Exception):
+                await self.unregister_client(client)
             
     async def send_status_update(self, websocket: WebSocketServerProtocol = None):
         """Send current status to client(s)."""
+        if websocket is None and not self.connected_clients:
+            return  # Nobody to broadcast to
+            
         message = {
             "type": "status_update",
             "task": self.current_task,
             "pipeline": self.pipeline_status,
             "metrics": self.metrics,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": self._now()
         }
         
         if websocket:
-            await websocket.send(json.dumps(message))
+            await websocket.send(dumps_message(message))
         else:
             await self.send_to_all_clients(message)
             
+    def _enqueue(self, event: dict):
+        """Buffer an event for the next coalesced broadcast."""
+        self._pending.append(event)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after(BATCH_WINDOW_S))
+            
+    async def _flush_after(self, delay: float):
+        """Broadcast events buffered during the window as a single frame."""
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._flush_task = None
+        events, self._pending = self._pending, []
+        if len(events) == 1:
+            await self.send_to_all_clients(events[0])
+        elif events:
+            await self.send_to_all_clients({"type": "batch", "events": events})
+            
     async def update_node_status(self, node: str, status: str, progress: Optional[str] = None, error: Optional[str] = None):
         """Update status of a specific node."""
         if node in self.pipeline_status:
+            current = self.pipeline_status[node]
+            if (current["status"], current["progress"], current["error"]) == (status, progress, error):
+                return  # Nothing changed, skip the broadcast
+                
             self.pipeline_status[node]["status"] = status
             self.pipeline_status[node]["progress"] = progress
             self.pipeline_status[node]["error"] = error
             
-            await self.send_to_all_clients({
+            if not self.connected_clients:
+                return  # State is kept; late joiners get it via send_status_update
+                
+            self._enqueue({
                 "type": "node_update",
                 "node": node,
                 "status": status,
                 "progress": progress,
                 "error": error,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": self._now()
             })
             
     async def update_metrics(self, metrics: Dict):
         """Update pipeline metrics."""
+        if all(self.metrics.get(key) == value for key, value in metrics.items()):
+            return  # Nothing changed, skip the broadcast
+            
         self.metrics.update(metrics)
         
+        if not self.connected_clients:
+            return  # State is kept; late joiners get it via send_status_update
+            
         await self.send_to_all_clients({
             "type": "metrics_update",
             "metrics": self.metrics,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": self._now()
         })
         
     async def add_log(self, level: str, message: str):
         """Add a log entry."""
-        await self.send_to_all_clients({
+        if not self.connected_clients:
+            return  # Nobody to broadcast to
+            
+        self._enqueue({
             "type": "log",
             "level": level,
             "message": message,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": self._now()
         })
         
+    def _tail(self, log_file: Path) -> deque:
+        """Read only the bytes appended since the last call, keeping the last lines."""
+        offset, lines, partial = self._log_tails.get(log_file, (0, None, False))
+        if lines is None or log_file.stat().st_size < offset:
+            # First read, or the log was truncated/rotated
+            offset, lines = 0, deque(maxlen=LOG_TAIL_LINES)
+        elif partial:
+            lines.pop()  # Re-read below together with whatever was appended to it
+        partial = False
+        with open(log_file, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                lines.append(line)
+                if line.endswith(b"\n"):
+                    offset += len(line)
+                else:
+                    # Unterminated last line: shown now, replaced once it grows
+                    partial = True
+        self._log_tails[log_file] = (offset, lines, partial)
+        return lines
+        
     def read_log_file(self, task: str, stage: str) -> List[str]:
         """Read log file for a specific task and stage."""
         log_file = self.project_root / "logs" / f"{task}.{stage}.log"
         if log_file.exists():
             try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    return f.readlines()[-50:]  # Last 50 lines
+                return [line.decode('utf-8', errors='replace') for line in self._tail(log_file)]
             except Exception as e:
                 logger.error(f"Error reading log file {log_file}: {e}")
         return []
@@ -140,49 +336,111 @@ class OrchestratorMonitor:
         qa_file = self.project_root / "reports" / "qa.json"
         if qa_file.exists():
             try:
-                with open(qa_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                st = qa_file.stat()
+                key = (st.st_mtime_ns, st.st_size)
+                if self._qa_cache is not None and self._qa_cache[0] == key:
+                    return self._qa_cache[1]
+                    
+                data = qa_file.read_bytes()
+                report = loads_message(data)
+                self._qa_cache = (key, report)
+                return report
             except Exception as e:
                 logger.error(f"Error reading QA report {qa_file}: {e}")
         return None
         
+    async def _run_blocking(self, func, *args):
+        """Run a blocking call on the default executor (asyncio.to_thread needs 3.9)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
+        
+    async def _process_log_change(self, stage: str):
+        """Update a node's status from the last line of its log."""
+        logs = await self._run_blocking(self.read_log_file, self.current_task, stage)
+        if logs:
+            last_log = logs[-1].strip()
+            lowered = last_log.lower()
+            
+            if "ERROR" in last_log:
+                await self.update_node_status(stage, "failed", error=last_log)
+            elif "completed" in lowered or "concluído" in lowered:
+                await self.update_node_status(stage, "completed")
+            elif "starting" in lowered or "iniciando" in lowered:
+                await self.update_node_status(stage, "running", "0%")
+                
+    async def _process_qa_report(self):
+        """Push metrics from the QA report, if there is one."""
+        qa_report = await self._run_blocking(self.get_qa_report, self.current_task)
+        if qa_report:
+            await self.update_metrics({
+                "totalTime": qa_report.get("elapsed_sec", 0),
+                "testsPassed": qa_report.get("passed", 0),
+                "coverage": qa_report.get("coverage", 0),
+                "filesTouched": len(qa_report.get("artifacts", []))
+            })
+            
+    async def _process_change(self, path: Path):
+        """Dispatch a changed file under logs/ or reports/."""
+        if path.name == "qa.json":
+            await self._process_qa_report()
+        elif path.suffix == ".log":
+            # logs/<task>.<stage>.log
+            task, _, stage = path.stem.rpartition(".")
+            if task == self.current_task and stage in LOG_STAGES:
+                await self._process_log_change(stage)
+                
     async def monitor_orchestrator(self):
         """Monitor orchestrator files for changes and update status."""
+        if Observer is None:
+            await self._poll_orchestrator()
+            return
+            
+        loop = asyncio.get_running_loop()
+        changes: asyncio.Queue = asyncio.Queue()
+        observer = Observer()
+        handler = _ChangeHandler(loop, changes)
+        for directory in ("logs", "reports"):
+            watched = self.project_root / directory
+            watched.mkdir(parents=True, exist_ok=True)
+            observer.schedule(handler, str(watched))
+        observer.start()
+        
+        try:
+            # Pick up whatever was written before the observer started
+            for stage in LOG_STAGES:
+                await self._process_log_change(stage)
+            await self._process_qa_report()
+            
+            while True:
+                path = await changes.get()
+                try:
+                    await self._process_change(path)
+                except Exception as e:
+                    logger.error(f"Error monitoring orchestrator: {e}")
+        finally:
+            observer.stop()
+            
+    async def _poll_orchestrator(self):
+        """Fallback for monitor_orchestrator when watchdog isn't installed."""
         last_modified = {}
         
         while True:
             try:
                 # Check for log files
-                for stage in ["plan", "code", "integrate", "test", "report"]:
+                for stage in LOG_STAGES:
                     log_file = self.project_root / "logs" / f"{self.current_task}.{stage}.log"
                     
-                    if log_file.exists():
-                        current_mtime = log_file.stat().st_mtime
+                    try:
+                        current_mtime = (await self._run_blocking(log_file.stat)).st_mtime
+                    except FileNotFoundError:
+                        continue
                         
-                        if log_file not in last_modified or current_mtime > last_modified[log_file]:
-                            last_modified[log_file] = current_mtime
-                            
-                            # Determine node status based on log content
-                            logs = self.read_log_file(self.current_task, stage)
-                            if logs:
-                                last_log = logs[-1].strip()
-                                
-                                if "ERROR" in last_log:
-                                    await self.update_node_status(stage, "failed", error=last_log)
-                                elif "completed" in last_log.lower() or "concluído" in last_log.lower():
-                                    await self.update_node_status(stage, "completed")
-                                elif "starting" in last_log.lower() or "iniciando" in last_log.lower():
-                                    await self.update_node_status(stage, "running", "0%")
+                    if log_file not in last_modified or current_mtime > last_modified[log_file]:
+                        last_modified[log_file] = current_mtime
+                        await self._process_log_change(stage)
                                     
                 # Check for QA report updates
-                qa_report = self.get_qa_report(self.current_task)
-                if qa_report:
-                    await self.update_metrics({
-                        "totalTime": qa_report.get("elapsed_sec", 0),
-                        "testsPassed": qa_report.get("passed", 0),
-                        "coverage": qa_report.get("coverage", 0),
-                        "filesTouched": len(qa_report.get("artifacts", []))
-                    })
+                await self._process_qa_report()
                     
             except Exception as e:
                 logger.error(f"Error monitoring orchestrator: {e}")
@@ -190,19 +448,18 @@ class OrchestratorMonitor:
             await asyncio.sleep(2)  # Check every 2 seconds
 
 
-async def handle_client(websocket: WebSocketServerProtocol, path: str):
+async def handle_client(websocket: WebSocketServerProtocol, path: str, monitor: OrchestratorMonitor):
     """Handle WebSocket client connections."""
-    monitor = OrchestratorMonitor()
-    
-    await monitor.register_client(websocket)
+    if not await monitor.register_client(websocket):
+        return
     
     try:
         async for message in websocket:
             try:
-                data = json.loads(message)
+                data = loads_message(message)
                 await handle_client_message(websocket, data, monitor)
-            except json.JSONDecodeError:
-                await websocket.send(json.dumps({
+            except ValueError:
+                await websocket.send(dumps_message({
                     "type": "error",
                     "message": "Invalid JSON"
                 }))
@@ -227,14 +484,13 @@ async def handle_client_message(websocket: WebSocketServerProtocol, data: dict,
         monitor.start_time = time.time()
         
         # Reset pipeline status
-        for node in monitor.pipeline_status:
-            monitor.pipeline_status[node] = {"status": "waiting", "progress": None, "error": None}
+        monitor.pipeline_status = copy.deepcopy(PIPELINE_RESET_TEMPLATE)
             
         await monitor.add_log("INFO", f"Starting pipeline for task: {monitor.current_task}")
         await monitor.send_to_all_clients({
             "type": "pipeline_start",
             "task": monitor.current_task,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": monitor._now()
         })
         
     elif message_type == "update_task":
@@ -242,7 +498,7 @@ async def handle_client_message(websocket: WebSocketServerProtocol, data: dict,
         await monitor.add_log("INFO", f"Switched to task: {monitor.current_task}")
         
     else:
-        await websocket.send(json.dumps({
+        await websocket.send(dumps_message({
             "type": "error",
             "message": f"Unknown message type: {message_type}"
         }))
@@ -255,17 +511,28 @@ async def main():
     
     logger.info(f"Starting Maestro Dashboard server on {host}:{port}")
     
-    # Start monitoring task
+    # One monitor shared by the polling task and every client connection
     monitor = OrchestratorMonitor()
     monitoring_task = asyncio.create_task(monitor.monitor_orchestrator())
     
     # Start WebSocket server
-    async with websockets.serve(handle_client, host, port):
+    handler = functools.partial(handle_client, monitor=monitor)
+    # Small inbound frames only; reap dead clients quickly
+    async with websockets.serve(
+        handler, host, port,
+        max_size=2**16,
+        ping_interval=20,
+        ping_timeout=10,
+        close_timeout=1
+    ):
         logger.info(f"Dashboard server running on ws://{host}:{port}")
         await asyncio.Future()  # Run forever
 
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        uvloop.install()
+        
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
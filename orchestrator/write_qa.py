@@ -6,22 +6,84 @@ Consolida métricas de linting, type checking e testes em um único arquivo JSON
 
 import argparse
 import json
+import os
 import time
 import datetime
 import sys
 import re
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # orjson é opcional; usa json da stdlib
+    orjson = None
+
+# Padrões compilados uma única vez na carga do módulo
+# Resumo do pytest numa única expressão: cada match preenche um dos grupos
+SUMMARY_PATTERN = re.compile(
+    r"TOTAL\s+\d+\s+\d+\s+(?P<coverage>\d+)%"
+    r"|(?P<passed>\d+) passed"
+    r"|(?P<failed>\d+) failed"
+)
+ERROR_LINE_PATTERN = re.compile(r"^.*error", re.IGNORECASE | re.MULTILINE)
+
+# Bits de falha por etapa (ver failure_mask)
+LINT_FAILED = 1
+TYPES_FAILED = 2
+TESTS_FAILED = 4
+
+# Ações por etapa que falhou: (bit, ação, ((trecho no output, ação extra), ...))
+NEXT_ACTIONS = (
+    (LINT_FAILED, "Corrigir erros de linting", (
+        ("unused import", "Remover imports não utilizados"),
+        ("line too long", "Quebrar linhas muito longas"),
+    )),
+    (TYPES_FAILED, "Corrigir erros de type checking", (
+        ("missing type annotation", "Adicionar anotações de tipo"),
+        ("incompatible types", "Corrigir incompatibilidades de tipo"),
+    )),
+    (TESTS_FAILED, "Corrigir testes falhando", (
+        ("assertion error", "Verificar asserções dos testes"),
+        ("import error", "Verificar imports dos testes"),
+    )),
+)
+
+# O resumo do pytest (e a tabela de cobertura) ficam no fim do output
+SUMMARY_TAIL_CHARS = 2048
+
+
+def summary_start(output):
+    """Início da janela final do output, recuado até o começo de uma linha."""
+    cut = len(output) - SUMMARY_TAIL_CHARS
+    # Um corte no meio de "123 passed" leria "23 passed"
+    return output.rfind("\n", 0, cut) + 1 if cut > 0 else 0
+
+
+def scan_summary(output):
+    """Lê cobertura e contagens de testes numa única passada pelo output.
+
+    Para cada grupo vale o primeiro match na janela final; sem nenhum ali,
+    o primeiro match do output inteiro.
+    """
+    start = summary_start(output)
+    first, in_tail = {}, {}
+    for match in SUMMARY_PATTERN.finditer(output):
+        name = match.lastgroup
+        first.setdefault(name, int(match.group(name)))
+        if match.start() >= start:
+            in_tail.setdefault(name, int(match.group(name)))
+    return {**first, **in_tail}
+
 
 def parse_arguments():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description="Gerar relatório QA")
     parser.add_argument("--task", required=True, help="ID da task")
-    parser.add_argument("--lint_rc", required=True, help="Código de retorno do linting")
+    parser.add_argument("--lint_rc", required=True, type=int, help="Código de retorno do linting")
     parser.add_argument("--lint_out", default="", help="Output do linting")
-    parser.add_argument("--types_rc", required=True, help="Código de retorno do type checking")
+    parser.add_argument("--types_rc", required=True, type=int, help="Código de retorno do type checking")
     parser.add_argument("--types_out", default="", help="Output do type checking")
-    parser.add_argument("--tests_rc", required=True, help="Código de retorno dos testes")
+    parser.add_argument("--tests_rc", required=True, type=int, help="Código de retorno dos testes")
     parser.add_argument("--tests_out", default="", help="Output dos testes")
     return parser.parse_args()
 
@@ -31,13 +93,12 @@ def extract_coverage(output):
     if not output:
         return 0.0
     
-    # Padrão para cobertura do pytest
-    coverage_pattern = r"TOTAL\s+\d+\s+\d+\s+(\d+)%"
-    match = re.search(coverage_pattern, output)
-    
-    if match:
-        return float(match.group(1))
-    return 0.0
+    return coverage_from_summary(scan_summary(output))
+
+
+def coverage_from_summary(summary):
+    """Cobertura a partir do resultado de scan_summary."""
+    return float(summary.get("coverage", 0))
 
 
 def extract_test_results(output):
@@ -45,15 +106,13 @@ def extract_test_results(output):
     if not output:
         return {"passed": 0, "failed": 0, "tests_run": []}
     
-    # Padrões para resultados de testes
-    passed_pattern = r"(\d+) passed"
-    failed_pattern = r"(\d+) failed"
-    
-    passed_match = re.search(passed_pattern, output)
-    failed_match = re.search(failed_pattern, output)
-    
-    passed = int(passed_match.group(1)) if passed_match else 0
-    failed = int(failed_match.group(1)) if failed_match else 0
+    return results_from_summary(scan_summary(output))
+
+
+def results_from_summary(summary):
+    """Resultados de testes a partir do resultado de scan_summary."""
+    passed = summary.get("passed", 0)
+    failed = summary.get("failed", 0)
     
     # Lista de testes executados (simplificado)
     tests_run = []
@@ -74,9 +133,7 @@ def extract_lint_errors(output):
     if not output:
         return 0
     
-    # Contar linhas que indicam erros
-    error_lines = [line for line in output.split('\n') if 'error' in line.lower()]
-    return len(error_lines)
+    return count_error_lines(output)
 
 
 def extract_type_errors(output):
@@ -84,16 +141,40 @@ def extract_type_errors(output):
     if not output:
         return 0
     
-    # Contar linhas que indicam erros de tipo
-    error_lines = [line for line in output.split('\n') if 'error' in line.lower()]
-    return len(error_lines)
+    return count_error_lines(output)
+
+
+def count_error_lines(output):
+    """Conta linhas que mencionam 'error', sem quebrar o output em lista."""
+    return sum(1 for _ in ERROR_LINE_PATTERN.finditer(output))
+
+
+def parse_outputs(tests_out, lint_out, types_out):
+    """Extrai todas as métricas, percorrendo cada output uma única vez."""
+    summary = scan_summary(tests_out or "")
+    return {
+        "coverage": coverage_from_summary(summary),
+        "test_results": results_from_summary(summary),
+        "lint_errors": extract_lint_errors(lint_out),
+        "type_errors": extract_type_errors(types_out),
+    }
+
+
+def failure_mask(lint_rc, types_rc, tests_rc):
+    """Combina os códigos de retorno num bitmask de etapas que falharam."""
+    return (
+        (LINT_FAILED if int(lint_rc) != 0 else 0)
+        | (TYPES_FAILED if int(types_rc) != 0 else 0)
+        | (TESTS_FAILED if int(tests_rc) != 0 else 0)
+    )
 
 
 def determine_status(lint_rc, types_rc, tests_rc):
     """Determina status geral baseado nos códigos de retorno."""
-    if lint_rc == "0" and types_rc == "0" and tests_rc == "0":
+    mask = failure_mask(lint_rc, types_rc, tests_rc)
+    if mask == 0:
         return "pass"
-    elif lint_rc == "0" and types_rc == "0":
+    elif mask == TESTS_FAILED:
         return "soft-fail"  # Testes falharam mas lint/types ok
     else:
         return "fail"
@@ -101,32 +182,26 @@ def determine_status(lint_rc, types_rc, tests_rc):
 
 def generate_next_actions(lint_rc, types_rc, tests_rc, lint_out, types_out, tests_out):
     """Gera lista de próximas ações baseada nos resultados."""
+    mask = failure_mask(lint_rc, types_rc, tests_rc)
+    outputs = {LINT_FAILED: lint_out, TYPES_FAILED: types_out, TESTS_FAILED: tests_out}
     actions = []
     
-    if lint_rc != "0":
-        actions.append("Corrigir erros de linting")
-        if "unused import" in lint_out:
-            actions.append("Remover imports não utilizados")
-        if "line too long" in lint_out:
-            actions.append("Quebrar linhas muito longas")
-    
-    if types_rc != "0":
-        actions.append("Corrigir erros de type checking")
-        if "missing type annotation" in types_out:
-            actions.append("Adicionar anotações de tipo")
-        if "incompatible types" in types_out:
-            actions.append("Corrigir incompatibilidades de tipo")
-    
-    if tests_rc != "0":
-        actions.append("Corrigir testes falhando")
-        if "assertion error" in tests_out:
-            actions.append("Verificar asserções dos testes")
-        if "import error" in tests_out:
-            actions.append("Verificar imports dos testes")
+    for flag, action, hints in NEXT_ACTIONS:
+        if mask & flag:
+            actions.append(action)
+            output = outputs[flag]
+            actions.extend(hint_action for needle, hint_action in hints if needle in output)
     
     return actions
 
 
+def serialize_report(qa_report):
+    """Serializa o relatório uma única vez em bytes UTF-8 (orjson quando disponível)."""
+    if orjson is not None:
+        return orjson.dumps(qa_report, option=orjson.OPT_INDENT_2)
+    return json.dumps(qa_report, indent=2, ensure_ascii=False).encode("utf-8")
+
+
 def calculate_perf_metrics(start_time, end_time):
     """Calcula métricas de performance."""
     elapsed_sec = (end_time - start_time).total_seconds()
@@ -147,10 +222,11 @@ def main():
     end_time = start_time
     
     # Extrair métricas dos outputs
-    coverage = extract_coverage(args.tests_out)
-    test_results = extract_test_results(args.tests_out)
-    lint_errors = extract_lint_errors(args.lint_out)
-    type_errors = extract_type_errors(args.types_out)
+    metrics = parse_outputs(args.tests_out, args.lint_out, args.types_out)
+    coverage = metrics["coverage"]
+    test_results = metrics["test_results"]
+    lint_errors = metrics["lint_errors"]
+    type_errors = metrics["type_errors"]
     
     # Determinar status
     status = determine_status(args.lint_rc, args.types_rc, args.tests_rc)
@@ -194,11 +270,16 @@ def main():
     reports_dir.mkdir(exist_ok=True)
     
     qa_file = reports_dir / "qa.json"
-    with open(qa_file, "w", encoding="utf-8") as f:
-        json.dump(qa_report, f, indent=2, ensure_ascii=False)
+    report_bytes = serialize_report(qa_report)
+    # Escrita atômica: o dashboard nunca lê um qa.json pela metade
+    tmp_file = qa_file.with_suffix(".json.tmp")
+    tmp_file.write_bytes(report_bytes)
+    os.replace(tmp_file, qa_file)
     
     # Output para stdout (para compatibilidade com shell scripts)
-    print(json.dumps(qa_report, indent=2))
+    sys.stdout.flush()
+    sys.stdout.buffer.write(report_bytes + b"\n")
+    sys.stdout.flush()
     
     # Log de conclusão
     print(f"📊 Relatório QA salvo em: {qa_file}", file=sys.stderr)
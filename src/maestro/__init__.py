@@ -11,5 +11,6 @@ __email__ = "julio@example.com"
 
 from .orchestrator import Orchestrator
 from .dashboard import DashboardServer
+from .pipeline import Pipeline, PipelineBuilder
 
-__all__ = ["Orchestrator", "DashboardServer"]
\ No newline at end of file
+__all__ = ["Orchestrator", "DashboardServer", "Pipeline", "PipelineBuilder"]
\ No newline at end of file
@@ -9,15 +9,25 @@ Manages deployment and rollback operations:
 - Integrate with GitHub Actions
 """
 
+import asyncio
+import copy
+import functools
 import json
 import logging
+import logging.handlers
 import os
 import subprocess
 import sys
+import threading
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore
 
 # Configure logging
 logging.basicConfig(
@@ -52,6 +62,77 @@ DEFAULT_CONFIG: Dict = {
     },
 }
 
+# Parsed and merged configs by path, keyed on (mtime_ns, size) of the file
+_CONFIG_CACHE: Dict[str, Tuple[Tuple[int, int], Dict]] = {}
+_CONFIG_CACHE_LOCK = threading.Lock()
+
+# Seconds between GitHub API polls made by `gh run watch`
+RUN_WATCH_INTERVAL = 10
+
+# Seconds to wait between `gh run list` calls while a dispatched run is not visible yet
+RUN_LOOKUP_DELAYS = (1, 2, 4)
+
+# Workflow-dispatch runs listed when looking for the run a dispatch created
+RUN_LOOKUP_LIMIT = 10
+
+# Deploy status poll intervals: short while a fast run may finish, then capped
+POLL_INTERVALS = (2, 2, 5, 5, 10, 15, 30)
+MAX_POLL_INTERVAL = 60
+
+# Size cap for the CI/CD log file before it is rotated
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+
+def _loads(data):
+    """Parse gh's JSON output straight from bytes (orjson when available)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps(data: Dict) -> str:
+    """Serialize a log record (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data)
+
+
+def _decode(output) -> str:
+    """Decode captured bytes only when they are actually logged"""
+    if isinstance(output, bytes):
+        return output.decode('utf-8', 'replace')
+    return output
+
+
+def _default_config() -> Dict:
+    """Independent copy of DEFAULT_CONFIG; a shallow copy would share the nested sections"""
+    return copy.deepcopy(DEFAULT_CONFIG)
+
+
+def _adaptive_intervals():
+    """Yield poll intervals that grow from a few seconds up to MAX_POLL_INTERVAL"""
+    yield from POLL_INTERVALS
+    while True:
+        yield MAX_POLL_INTERVAL
+
+
+def _utc_now_iso() -> str:
+    """Current time in the format GitHub uses for createdAt"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+@functools.lru_cache(maxsize=1)
+def _github_cli_available() -> bool:
+    """Probe `gh --version` once per process; availability doesn't change at runtime"""
+    try:
+        result = subprocess.run(
+            ['gh', '--version'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        return result.returncode == 0
+    except FileNotFoundError:
+        return False
+
 
 class CICDAgent:
     """Agent for CI/CD operations in Maestro pipeline"""
@@ -61,9 +142,39 @@ class CICDAgent:
         self.config_path = config_path
         self.config = self._load_config()
         self._setup_logging()
+        # Run tracking is keyed by task so concurrent waits on different
+        # tasks (see the async variants) never see each other's runs.
+        # Dispatches whose run is not visible yet: (workflow, newest earlier
+        # run id or None if unknown, UTC dispatch time)
+        self._dispatches: Dict[str, Tuple[str, Optional[int], str]] = {}
+        # Workflow run started by the last trigger for each task
+        self._pending_runs: Dict[str, int] = {}
+        # Run seen by the last status check for each task
+        self._last_run_ids: Dict[str, int] = {}
         
     def _load_config(self) -> Dict:
-        """Load configuration from JSON file"""
+        """Load configuration from JSON file, reusing the parse while it is unchanged"""
+        try:
+            st = os.stat(self.config_path)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Using default config due to error reading {self.config_path}: {e}")
+            return _default_config()
+        
+        key = (st.st_mtime_ns, st.st_size)
+        with _CONFIG_CACHE_LOCK:
+            cached = _CONFIG_CACHE.get(self.config_path)
+        if cached is not None and cached[0] == key:
+            return copy.deepcopy(cached[1])
+        
+        config = self._read_config()
+        if config is not None:
+            with _CONFIG_CACHE_LOCK:
+                _CONFIG_CACHE[self.config_path] = (key, config)
+            return copy.deepcopy(config)
+        return _default_config()
+    
+    def _read_config(self) -> Optional[Dict]:
+        """Parse the JSON config and merge it over the defaults (None on error)"""
         def merge_defaults(cfg: Dict) -> Dict:
             merged = {}
             for key, defaults in DEFAULT_CONFIG.items():
@@ -72,8 +183,6 @@ class CICDAgent:
                     merged[key] = defaults.copy()
                 else:
                     section = defaults.copy()
-                    for k2, v2 in defaults.items():
-                        section.setdefault(k2, v2)
                     section.update(val)
                     merged[key] = section
             for k in cfg.keys():
@@ -86,21 +195,31 @@ class CICDAgent:
                 cfg = json.load(f)
                 if not isinstance(cfg, dict):
                     logger.warning("Config content is not a dict; using defaults")
-                    return DEFAULT_CONFIG.copy()
+                    return None
                 return merge_defaults(cfg)
         except (FileNotFoundError, json.JSONDecodeError, TypeError) as e:
             logger.warning(f"Using default config due to error reading {self.config_path}: {e}")
-            return DEFAULT_CONFIG.copy()
+            return None
     
     def _setup_logging(self):
         """Setup structured logging"""
         log_config = self.config.get('logging', {})
         log_file = log_config.get('log_file', 'logs/ci-cd-automation.log')
         try:
+            # Every agent shares the module logger; attach the file only once
+            log_path = Path(log_file).resolve()
+            if any(
+                isinstance(handler, logging.FileHandler)
+                and Path(handler.baseFilename) == log_path
+                for handler in logger.handlers
+            ):
+                return
             # Ensure log directory exists
-            Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+            log_path.parent.mkdir(parents=True, exist_ok=True)
             # Add file handler (guarded to avoid issues under mocked open)
-            file_handler = logging.FileHandler(log_file)
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT
+            )
             file_handler.setLevel(logging.INFO)
             logger.addHandler(file_handler)
         except Exception as e:
@@ -108,6 +227,9 @@ class CICDAgent:
     
     def _log_operation(self, operation: str, task_id: str, status: str, **kwargs):
         """Log structured operation data"""
+        # Skip building and serializing the record when INFO is filtered out
+        if not logger.isEnabledFor(logging.INFO):
+            return
         log_data = {
             "timestamp": datetime.now().isoformat(),
             "task_id": task_id,
@@ -115,15 +237,11 @@ class CICDAgent:
             "status": status,
             **kwargs
         }
-        logger.info(f"CI/CD operation: {json.dumps(log_data)}")
+        logger.info("CI/CD operation: %s", _dumps(log_data))
     
     def _check_github_cli(self) -> bool:
         """Check if GitHub CLI is available"""
-        try:
-            result = subprocess.run(['gh', '--version'], capture_output=True)
-            return result.returncode == 0
-        except FileNotFoundError:
-            return False
+        return _github_cli_available()
     
     def deploy_staging(self, task_id: str, branch_name: str) -> bool:
         """Deploy to staging environment"""
@@ -143,24 +261,27 @@ class CICDAgent:
             # Trigger GitHub Actions workflow for staging
             workflow_name = self.config['ci_cd']['github_actions_workflow']
             
+            dispatch = self._dispatch_marker(workflow_name)
             result = subprocess.run([
                 'gh', 'workflow', 'run', workflow_name,
                 '--field', f'task_id={task_id}',
                 '--field', 'action=deploy-staging'
-            ], capture_output=True, text=True)
+            ], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
             
             if result.returncode == 0:
                 logger.info(f"Staging deployment triggered for {task_id}")
+                self._track_dispatch(task_id, dispatch)
                 self._log_operation(
                     "deploy_staging", task_id, "triggered", 
                     branch=branch_name, workflow=workflow_name
                 )
                 return True
             else:
-                logger.error(f"Failed to trigger staging deployment: {result.stderr}")
+                stderr = _decode(result.stderr)
+                logger.error(f"Failed to trigger staging deployment: {stderr}")
                 self._log_operation(
                     "deploy_staging", task_id, "error", 
-                    error=result.stderr
+                    error=stderr
                 )
                 return False
                 
@@ -170,6 +291,56 @@ class CICDAgent:
             self._log_operation("deploy_staging", task_id, "error", error=str(e))
             return True
     
+    def _list_dispatch_runs(self, workflow_name: str, limit: int) -> Optional[List[Dict]]:
+        """Newest workflow_dispatch runs of a workflow (None if gh fails)"""
+        result = subprocess.run([
+            'gh', 'run', 'list', '--workflow', workflow_name,
+            '--event', 'workflow_dispatch', '--limit', str(limit),
+            '--json', 'databaseId,createdAt'
+        ], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        return _loads(result.stdout) if result.returncode == 0 else None
+    
+    def _dispatch_marker(self, workflow_name: str) -> Tuple[str, Optional[int], str]:
+        """Note the newest existing run before a dispatch, so its run can be told apart"""
+        try:
+            runs = self._list_dispatch_runs(workflow_name, 1)
+        except Exception as e:
+            logger.warning(f"Could not list runs of {workflow_name}: {e}")
+            runs = None
+        newest = None
+        if runs is not None:
+            newest = runs[0]['databaseId'] if runs else 0
+        return workflow_name, newest, _utc_now_iso()
+    
+    def _track_dispatch(self, task_id: str, dispatch: Tuple[str, Optional[int], str]) -> None:
+        """Remember a successful dispatch; its run is looked up when the status is checked"""
+        self._pending_runs.pop(task_id, None)
+        self._dispatches[task_id] = dispatch
+    
+    def _resolve_run(self, task_id: str) -> Optional[int]:
+        """Find the run created by the task's dispatch, retrying while GitHub creates it"""
+        workflow_name, newest, dispatched_at = self._dispatches[task_id]
+        for delay in (0,) + RUN_LOOKUP_DELAYS:
+            if delay:
+                time.sleep(delay)
+            try:
+                runs = self._list_dispatch_runs(workflow_name, RUN_LOOKUP_LIMIT) or []
+            except Exception as e:
+                logger.warning(f"Could not resolve workflow run for {task_id}: {e}")
+                runs = []
+            # Run ids grow with creation; the local clock is only a fallback
+            # for when the runs before the dispatch could not be listed
+            new_runs = [
+                run['databaseId'] for run in runs
+                if (run['databaseId'] > newest if newest is not None else run['createdAt'] >= dispatched_at)
+            ]
+            if new_runs:
+                run_id = min(new_runs)
+                del self._dispatches[task_id]
+                self._pending_runs[task_id] = run_id
+                return run_id
+        return None
+    
     def check_deploy_status(self, task_id: str) -> str:
         """Check deployment status"""
         try:
@@ -178,20 +349,39 @@ class CICDAgent:
                 logger.warning("GitHub CLI not available, cannot check deploy status")
                 return "unknown"
             
-            # Get latest workflow run for the task
-            workflow_name = self.config['ci_cd']['github_actions_workflow']
-            
-            result = subprocess.run([
-                'gh', 'run', 'list', '--workflow', workflow_name,
-                '--limit', '1', '--json', 'status,conclusion'
-            ], capture_output=True, text=True)
+            self._last_run_ids.pop(task_id, None)
+            run_id = self._pending_runs.get(task_id)
+            if run_id is None and task_id in self._dispatches:
+                run_id = self._resolve_run(task_id)
+                if run_id is None:
+                    # Dispatched, but GitHub has not created the run yet
+                    logger.info(f"Workflow run for {task_id} not visible yet")
+                    return 'pending'
+            if run_id is not None:
+                # Poll the run this agent triggered
+                result = subprocess.run([
+                    'gh', 'run', 'view', str(run_id),
+                    '--json', 'databaseId,status,conclusion'
+                ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            else:
+                # Nothing dispatched by this agent: get the latest workflow run
+                workflow_name = self.config['ci_cd']['github_actions_workflow']
+                
+                result = subprocess.run([
+                    'gh', 'run', 'list', '--workflow', workflow_name,
+                    '--limit', '1', '--json', 'databaseId,status,conclusion',
+                    '--jq', '.[0]'  # project the latest run inside gh
+                ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
             
             if result.returncode == 0:
                 try:
-                    runs = json.loads(result.stdout)
-                    if runs:
-                        status = runs[0]['status']
-                        conclusion = runs[0]['conclusion']
+                    # Both commands print a single run object (nothing/null if none)
+                    run = _loads(result.stdout) if result.stdout.strip() else None
+                    if run:
+                        if run.get('databaseId') is not None:
+                            self._last_run_ids[task_id] = run['databaseId']
+                        status = run['status']
+                        conclusion = run['conclusion']
                         
                         if status == 'completed':
                             if conclusion == 'success':
@@ -206,7 +396,7 @@ class CICDAgent:
                     logger.error("Failed to parse workflow runs")
                     return 'unknown'
             else:
-                logger.error(f"Failed to get workflow runs: {result.stderr}")
+                logger.error(f"Failed to get workflow runs: {_decode(result.stderr)}")
                 return 'unknown'
                 
         except Exception as e:
@@ -218,6 +408,7 @@ class CICDAgent:
         logger.info(f"Waiting for deployment completion for {task_id}")
         
         start_time = time.time()
+        intervals = _adaptive_intervals()
         while time.time() - start_time < timeout:
             status = self.check_deploy_status(task_id)
             
@@ -225,12 +416,36 @@ class CICDAgent:
                 logger.info(f"Deployment completed with status: {status}")
                 return status
             
-            logger.info(f"Deployment still running, status: {status}")
-            time.sleep(30)  # Check every 30 seconds
+            run_id = self._last_run_ids.get(task_id)
+            if status == 'running' and run_id is not None:
+                # Block on the run itself instead of polling the run list
+                remaining = timeout - (time.time() - start_time)
+                return self._watch_run(task_id, run_id, remaining)
+            
+            # Run not visible yet, check again after the next backoff step
+            interval = min(next(intervals), max(timeout - (time.time() - start_time), 0))
+            logger.info(f"Deployment still running, status: {status}; next check in {interval:.0f}s")
+            time.sleep(interval)
         
         logger.warning(f"Deployment timeout for {task_id}")
         return 'timeout'
     
+    def _watch_run(self, task_id: str, run_id: int, timeout: float) -> str:
+        """Wait for a workflow run with `gh run watch`, mapping its exit status"""
+        logger.info(f"Watching workflow run {run_id} for {task_id}")
+        try:
+            result = subprocess.run([
+                'gh', 'run', 'watch', str(run_id),
+                '--exit-status', '--interval', str(RUN_WATCH_INTERVAL)
+            ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=max(timeout, 0))
+        except subprocess.TimeoutExpired:
+            logger.warning(f"Deployment timeout for {task_id}")
+            return 'timeout'
+        
+        status = 'success' if result.returncode == 0 else 'failed'
+        logger.info(f"Deployment completed with status: {status}")
+        return status
+    
     def rollback_deploy(self, task_id: str) -> bool:
         """Rollback deployment"""
         try:
@@ -249,19 +464,22 @@ class CICDAgent:
             # Trigger rollback workflow
             workflow_name = self.config['ci_cd']['github_actions_workflow']
             
+            dispatch = self._dispatch_marker(workflow_name)
             result = subprocess.run([
                 'gh', 'workflow', 'run', workflow_name,
                 '--field', f'task_id={task_id}',
                 '--field', 'action=rollback'
-            ], capture_output=True, text=True)
+            ], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
             
             if result.returncode == 0:
                 logger.info(f"Rollback triggered for {task_id}")
+                self._track_dispatch(task_id, dispatch)
                 self._log_operation("rollback_deploy", task_id, "triggered")
                 return True
             else:
-                logger.error(f"Failed to trigger rollback: {result.stderr}")
-                self._log_operation("rollback_deploy", task_id, "error", error=result.stderr)
+                stderr = _decode(result.stderr)
+                logger.error(f"Failed to trigger rollback: {stderr}")
+                self._log_operation("rollback_deploy", task_id, "error", error=stderr)
                 return False
                 
         except Exception as e:
@@ -292,19 +510,22 @@ class CICDAgent:
             # Trigger production deployment workflow
             workflow_name = self.config['ci_cd']['github_actions_workflow']
             
+            dispatch = self._dispatch_marker(workflow_name)
             result = subprocess.run([
                 'gh', 'workflow', 'run', workflow_name,
                 '--field', f'task_id={task_id}',
                 '--field', 'action=deploy-production'
-            ], capture_output=True, text=True)
+            ], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
             
             if result.returncode == 0:
                 logger.info(f"Production deployment triggered for {task_id}")
+                self._track_dispatch(task_id, dispatch)
                 self._log_operation("production_deploy", task_id, "triggered")
                 return True
             else:
-                logger.error(f"Failed to trigger production deployment: {result.stderr}")
-                self._log_operation("production_deploy", task_id, "error", error=result.stderr)
+                stderr = _decode(result.stderr)
+                logger.error(f"Failed to trigger production deployment: {stderr}")
+                self._log_operation("production_deploy", task_id, "error", error=stderr)
                 return False
                 
         except Exception as e:
@@ -365,6 +586,41 @@ class CICDAgent:
             logger.error(f"Deployment automation failed for {task_id}: {e}")
             return False
 
+    
+    # Async variants for callers running inside an event loop (e.g. the
+    # dashboard). The gh calls and waits run on the default executor so the
+    # loop stays responsive. Calls for different tasks can run concurrently
+    # since run tracking is per task; calls for the same task should not.
+    
+    async def _run_in_executor(self, func, *args):
+        """Run a blocking agent method without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args))
+    
+    async def adeploy_staging(self, task_id: str, branch_name: str) -> bool:
+        """Async variant of deploy_staging"""
+        return await self._run_in_executor(self.deploy_staging, task_id, branch_name)
+    
+    async def acheck_deploy_status(self, task_id: str) -> str:
+        """Async variant of check_deploy_status"""
+        return await self._run_in_executor(self.check_deploy_status, task_id)
+    
+    async def await_for_deploy(self, task_id: str, timeout: int = 300) -> str:
+        """Async variant of wait_for_deploy"""
+        return await self._run_in_executor(self.wait_for_deploy, task_id, timeout)
+    
+    async def arollback_deploy(self, task_id: str) -> bool:
+        """Async variant of rollback_deploy"""
+        return await self._run_in_executor(self.rollback_deploy, task_id)
+    
+    async def atrigger_production_deploy(self, task_id: str) -> bool:
+        """Async variant of trigger_production_deploy"""
+        return await self._run_in_executor(self.trigger_production_deploy, task_id)
+    
+    async def aauto_deploy_and_monitor(self, task_id: str, branch_name: str) -> bool:
+        """Async variant of auto_deploy_and_monitor"""
+        return await self._run_in_executor(self.auto_deploy_and_monitor, task_id, branch_name)
+
 
 def main():
     """Main entry point for CI/CD Agent"""
@@ -6,15 +6,54 @@ import asyncio
 import json
 import logging
 import os
+import sys
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Optional, Set, Union
 
 import websockets
 from websockets.server import WebSocketServerProtocol
 
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore
+
+try:
+    import uvloop  # type: ignore
+except ImportError:  # pragma: no cover - optional, not available on Windows
+    uvloop = None  # type: ignore
+
 logger = logging.getLogger(__name__)
 
+# Node updates arriving within this window go out as one node_updates_batch frame
+NODE_UPDATE_WINDOW_S = 0.05
+
+# Messages built within this window share one timestamp
+TIMESTAMP_TTL_NS = 50_000_000
+
+# json.dumps(..., default=...) builds a new encoder per call; reuse one
+_FALLBACK_ENCODER = json.JSONEncoder(default=datetime.isoformat)
+
+
+def dumps_message(message: Dict) -> str:
+    """Serialize a message for the browser, natively encoding datetime values.
+
+    Uses orjson when installed and falls back to the stdlib encoder otherwise.
+    Returns str so websockets sends a text frame.
+    """
+    if orjson is not None:
+        return orjson.dumps(message).decode()
+    return _FALLBACK_ENCODER.encode(message)
+
+
+def loads_message(data: Union[str, bytes]) -> Dict:
+    """Parse an inbound frame; both parsers raise a ValueError subclass on bad input."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
 class DashboardServer:
     """WebSocket server for real-time dashboard monitoring."""
@@ -23,7 +62,7 @@ class DashboardServer:
         self.host = host
         self.port = port
         self.project_root = Path(project_root)
-        self.connected_clients: List[WebSocketServerProtocol] = []
+        self.connected_clients: Set[WebSocketServerProtocol] = set()
         self.current_task = "demo"
         self.pipeline_status = {
             "planner": {"status": "waiting", "progress": None, "error": None},
@@ -39,10 +78,23 @@ class DashboardServer:
             "filesTouched": 0
         }
         self.doc_status: Optional[Dict] = None
+        # Serialized status_update, rebuilt only after the state changes
+        self._status_cache: Optional[str] = None
+        # Latest node_update per node, waiting for the next batch flush
+        self._pending_updates: Dict[str, Dict] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._ts_cache = (0, datetime.now())
+        
+    def _now(self) -> datetime:
+        """Timestamp shared by all messages of one broadcast burst."""
+        t = time.time_ns()
+        if t - self._ts_cache[0] > TIMESTAMP_TTL_NS:
+            self._ts_cache = (t, datetime.fromtimestamp(t / 1e9))
+        return self._ts_cache[1]
         
     async def register_client(self, websocket: WebSocketServerProtocol) -> None:
         """Register a new WebSocket client."""
-        self.connected_clients.append(websocket)
+        self.connected_clients.add(websocket)
         logger.info(f"Client connected. Total clients: {len(self.connected_clients)}")
         
         # Send current status to new client
@@ -50,8 +102,7 @@ class DashboardServer:
         
     async def unregister_client(self, websocket: WebSocketServerProtocol) -> None:
         """Unregister a WebSocket client."""
-        if websocket in self.connected_clients:
-            self.connected_clients.remove(websocket)
+        self.connected_clients.discard(websocket)
         logger.info(f"Client disconnected. Total clients: {len(self.connected_clients)}")
         
     async def send_to_all_clients(self, message: Dict) -> None:
@@ -59,34 +110,40 @@ class DashboardServer:
         if not self.connected_clients:
             return
             
-        message_str = json.dumps(message)
-        disconnected = []
-        
-        for client in self.connected_clients:
-            try:
-                await client.send(message_str)
-            except websockets.exceptions.ConnectionClosed:
-                disconnected.append(client)
-                
+        await self._broadcast(dumps_message(message))
+        
+    async def _broadcast(self, message_str: str) -> None:
+        """Send an already serialized message to all connected clients."""
+        # Send to every client concurrently so a slow one doesn't hold up the rest
+        clients = tuple(self.connected_clients)
+        results = await asyncio.gather(
+            *(client.send(message_str) for client in clients),
+            return_exceptions=True
+        )
+        
         # Remove disconnected clients
-        for client in disconnected:
-            await self.unregister_client(client)
+        for client, result in zip(clients, results):
+            if isinstance(result, websockets.exceptions.ConnectionClosed):
+                await self.unregister_client(client)
+            elif isinstance(result, Exception):
+                logger.error(f"Error sending to client: {result}")
             
     async def send_status_update(self, websocket: Optional[WebSocketServerProtocol] = None) -> None:
         """Send current status to client(s)."""
-        message = {
-            "type": "status_update",
-            "task": self.current_task,
-            "pipeline": self.pipeline_status,
-            "metrics": self.metrics,
-            "doc_status": self.doc_status,
-            "timestamp": datetime.now().isoformat()
-        }
+        if self._status_cache is None:
+            self._status_cache = dumps_message({
+                "type": "status_update",
+                "task": self.current_task,
+                "pipeline": self.pipeline_status,
+                "metrics": self.metrics,
+                "doc_status": self.doc_status,
+                "timestamp": self._now()
+            })
         
         if websocket:
-            await websocket.send(json.dumps(message))
+            await websocket.send(self._status_cache)
         else:
-            await self.send_to_all_clients(message)
+            await self._broadcast(self._status_cache)
             
     async def update_node_status(self, node: str, status: str, progress: Optional[str] = None, error: Optional[str] = None) -> None:
         """Update status of a specific node."""
@@ -94,33 +151,62 @@ class DashboardServer:
             self.pipeline_status[node]["status"] = status
             self.pipeline_status[node]["progress"] = progress
             self.pipeline_status[node]["error"] = error
+            self._status_cache = None
             
-            await self.send_to_all_clients({
+            # Headless: new clients pick the state up from status_update
+            if not self.connected_clients:
+                return
+            
+            # Later updates to the same node replace earlier ones in the batch
+            self._pending_updates[node] = {
                 "type": "node_update",
                 "node": node,
                 "status": status,
                 "progress": progress,
                 "error": error,
-                "timestamp": datetime.now().isoformat()
-            })
+                "timestamp": self._now()
+            }
+            if self._flush_task is None:
+                self._flush_task = asyncio.create_task(self._flush_after(NODE_UPDATE_WINDOW_S))
+                
+    async def _flush_after(self, delay: float) -> None:
+        """Send the node updates collected during the window as a single frame."""
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            updates = list(self._pending_updates.values())
+            self._pending_updates.clear()
+            self._flush_task = None
+        
+        await self.send_to_all_clients({
+            "type": "node_updates_batch",
+            "updates": updates
+        })
             
     async def update_metrics(self, metrics: Dict) -> None:
         """Update pipeline metrics."""
         self.metrics.update(metrics)
+        self._status_cache = None
+        
+        if not self.connected_clients:
+            return
         
         await self.send_to_all_clients({
             "type": "metrics_update",
             "metrics": self.metrics,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": self._now()
         })
         
     async def add_log(self, level: str, message: str) -> None:
         """Add a log entry."""
+        if not self.connected_clients:
+            return
+            
         await self.send_to_all_clients({
             "type": "log",
             "level": level,
             "message": message,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": self._now()
         })
         
     async def start_server(self) -> None:
@@ -138,10 +224,10 @@ class DashboardServer:
         try:
             async for message in websocket:
                 try:
-                    data = json.loads(message)
+                    data = loads_message(message)
                     await self.handle_client_message(websocket, data)
-                except json.JSONDecodeError:
-                    await websocket.send(json.dumps({
+                except ValueError:
+                    await websocket.send(dumps_message({
                         "type": "error",
                         "message": "Invalid JSON"
                     }))
@@ -159,9 +245,15 @@ class DashboardServer:
         
         if message_type == "get_status":
             await self.send_status_update(websocket)
-            
+
+        elif message_type == "batch":
+            # Coalesced events from the orchestrator integration
+            for event in data.get("events", []):
+                await self.handle_client_message(websocket, event)
+
         elif message_type == "start_pipeline":
             self.current_task = data.get("task", "demo")
+            self._status_cache = None
             
             # Reset pipeline status
             for node in self.pipeline_status:
@@ -171,11 +263,23 @@ class DashboardServer:
             await self.send_to_all_clients({
                 "type": "pipeline_start",
                 "task": self.current_task,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": self._now()
             })
             
+        elif message_type == "pipeline_status":
+            # Periodic snapshot pushed by the orchestrator while it runs
+            self.current_task = data.get("task", self.current_task)
+            for node, node_status in data.get("pipeline", {}).items():
+                if node in self.pipeline_status:
+                    self.pipeline_status[node] = node_status
+            self.metrics.update(data.get("metrics", {}))
+            self._status_cache = None
+            if self.connected_clients:
+                await self.send_status_update()
+                
         elif message_type == "update_task":
             self.current_task = data.get("task", "demo")
+            self._status_cache = None
             await self.add_log("INFO", f"Switched to task: {self.current_task}")
         
         elif message_type == "doc_update":
@@ -188,17 +292,30 @@ class DashboardServer:
                 "coverage": data.get("coverage"),
                 "lint_errors": data.get("lint_errors"),
                 "type_errors": data.get("type_errors"),
-                "timestamp": data.get("timestamp", datetime.now().isoformat()),
+                "timestamp": data.get("timestamp", self._now().isoformat()),
             }
+            self._status_cache = None
             await self.send_to_all_clients({"type": "doc_update", **self.doc_status})
 
         else:
-            await websocket.send(json.dumps({
+            await websocket.send(dumps_message({
                 "type": "error",
                 "message": f"Unknown message type: {message_type}"
             }))
 
 
+def run_event_loop(coro):
+    """Run the coroutine on a uvloop event loop when installed, asyncio otherwise."""
+    if uvloop is None:
+        return asyncio.run(coro)
+    elif sys.version_info >= (3, 11):
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            return runner.run(coro)
+    else:
+        uvloop.install()
+        return asyncio.run(coro)
+
+
 def main():
     """Main entry point for the dashboard server."""
     import argparse
@@ -219,7 +336,7 @@ def main():
     server = DashboardServer(args.host, args.port, args.project_root)
     
     try:
-        asyncio.run(server.start_server())
+        run_event_loop(server.start_server())
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
     except Exception as e:
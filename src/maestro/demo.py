@@ -68,12 +68,12 @@ class DashboardDemo:
         
         print(f"🚀 Starting pipeline for task: {self.current_task}")
         
-        total_start_time = time.time()
+        total_start_ns = time.perf_counter_ns()
         
         for stage_name, description, min_time, max_time in stages:
             await self.simulate_stage(stage_name, description, min_time, max_time)
             
-        total_time = int(time.time() - total_start_time)
+        total_time = int((time.perf_counter_ns() - total_start_ns) / 1e9)
         
         # Send final metrics
         await self.send_message({
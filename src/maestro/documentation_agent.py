@@ -14,27 +14,97 @@ Environment:
 """
 
 import argparse
+import asyncio
 import json
 import logging
 import os
 import re
+import shutil
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 try:
     import websockets  # type: ignore
+    from websockets.protocol import State  # type: ignore
 except Exception:  # pragma: no cover - optional dependency available in repo
     websockets = None  # type: ignore
 
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore
+
 
 logger = logging.getLogger(__name__)
 
 
+def _dumps(data: Dict[str, Any]) -> str:
+    """Serialize a dashboard message (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data)
+
+
 AUTO_DOC_BEGIN = "<!-- BEGIN AUTO-DOC: DocumentationAgent -->"
 AUTO_DOC_END = "<!-- END AUTO-DOC -->"
+ISO_UTC_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+BACKUP_STAMP_FORMAT = "%Y%m%dT%H%M%SZ"
+AUTO_BLOCK_RE = re.compile(
+    re.escape(AUTO_DOC_BEGIN) + r"[\s\S]*?" + re.escape(AUTO_DOC_END),
+    re.MULTILINE,
+)
+# Auto-doc block with the markers baked in; only per-run values are substituted
+_AUTO_DOC_TEMPLATE = (
+    AUTO_DOC_BEGIN + "\n"
+    "\n"
+    "## 📚 Documentation Status {emoji}\n"
+    "\n"
+    "- Task: `{task_id}`\n"
+    "- Status: `{status}`\n"
+    "- Tests: `{passed}` passed, `{failed}` failed\n"
+    "- Coverage: `{coverage}%`\n"
+    "- Lint errors: `{lint_errors}` | Type errors: `{type_errors}`\n"
+    "- Last updated: `{now}`\n"
+    "\n"
+    "### Next Actions\n"
+    "{next_actions}"
+    "{sections}"
+    "\n"
+    "\n" + AUTO_DOC_END + "\n"
+)
+_SECTION_TEMPLATE = "\n\n### {title}\n{body}"
+# '## Header' lines; the capture interleaves headers with bodies on split
+SECTION_SPLIT = re.compile(r"^##\s+(.+?)\n", re.MULTILINE)
+
+# Contents of files read by the agent, keyed by path and validated by (mtime_ns, size)
+_FILE_CACHE: Dict[Path, Tuple[Tuple[int, int], str]] = {}
+_JSON_CACHE: Dict[Path, Tuple[Tuple[int, int], Any]] = {}
+
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _read_text_cached(path: Path) -> Optional[str]:
+    """Returns the file's text (None if missing), re-reading only after it changes."""
+    key = _stat_key(path)
+    if key is None:
+        _FILE_CACHE.pop(path, None)
+        return None
+    cached = _FILE_CACHE.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    text = path.read_text(encoding="utf-8")
+    _FILE_CACHE[path] = (key, text)
+    return text
 
 
 @dataclass
@@ -52,9 +122,16 @@ class QAReport:
 
     @classmethod
     def load(cls, path: Path) -> "QAReport":
-        if not path.exists():
+        key = _stat_key(path)
+        if key is None:
             raise FileNotFoundError(f"QA report not found: {path}")
-        data = json.loads(path.read_text(encoding="utf-8"))
+        cached = _JSON_CACHE.get(path)
+        if cached is not None and cached[0] == key:
+            data = cached[1]
+        else:
+            raw = path.read_bytes()
+            data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+            _JSON_CACHE[path] = (key, data)
         return cls(
             task_id=data.get("task_id", "unknown"),
             passed=int(data.get("passed", 0)),
@@ -69,18 +146,25 @@ class QAReport:
         )
 
 
+def parse_spec_sections(spec_text: str) -> Dict[str, str]:
+    """Maps each '## Header' (casefolded) to its body, in a single pass."""
+    parts = SECTION_SPLIT.split(spec_text)
+    sections: Dict[str, str] = {}
+    for header, body in zip(parts[1::2], parts[2::2]):
+        # First occurrence wins, as with a top-down search
+        sections.setdefault(header.strip().casefold(), body.strip())
+    return sections
+
+
 def read_section_from_spec(spec_text: str, header: str) -> str:
     """Extracts a markdown section body by header title (## Header)."""
-    # Match '## Header' until next '## ' or end of file
-    pattern = rf"^##\s+{re.escape(header)}\n(.*?)(?=\n##\s+|\Z)"
-    m = re.search(pattern, spec_text, flags=re.IGNORECASE | re.MULTILINE | re.DOTALL)
-    return m.group(1).strip() if m else ""
+    return parse_spec_sections(spec_text).get(header.casefold(), "")
 
 
 def bullet_list(items: List[str]) -> str:
     if not items:
         return "- None"
-    return "\n".join(f"- {it}" for it in items)
+    return "\n".join(map("- {}".format, items))
 
 
 def plan_steps_from_json(plan: Dict) -> List[str]:
@@ -92,13 +176,11 @@ def plan_steps_from_json(plan: Dict) -> List[str]:
     return steps
 
 
+_STATUS_EMOJI = {"pass": "🟢", "soft-fail": "🟡"}
+
+
 def emoji_for_status(status: str) -> str:
-    s = status.lower()
-    if s == "pass":
-        return "🟢"
-    if s == "soft-fail":
-        return "🟡"
-    return "🔴"
+    return _STATUS_EMOJI.get(status.lower(), "🔴")
 
 
 class DocumentationAgent:
@@ -112,6 +194,9 @@ class DocumentationAgent:
         self.qa_path = self.root / "reports" / "qa.json"
         self.plan_path = self.root / "handoff" / "plan.json"
         self.spec_path = self.root / "handoff" / "spec.md"
+        # Dashboard connection and the loop it lives on, reused across runs
+        self._ws = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
 
     def ensure_templates(self) -> None:
         self.templates_dir.mkdir(parents=True, exist_ok=True)
@@ -129,24 +214,26 @@ class DocumentationAgent:
                 except Exception as e:
                     logger.warning(f"Failed to initialize template {dst}: {e}")
 
-    def backup_file(self, path: Path) -> None:
+    def backup_file(self, path: Path, when: Optional[time.struct_time] = None) -> None:
         try:
             if not path.exists():
                 return
             backups_dir = self.docs_dir / "backups"
             backups_dir.mkdir(parents=True, exist_ok=True)
-            ts = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+            ts = time.strftime(BACKUP_STAMP_FORMAT, when or time.gmtime())
             backup = backups_dir / f"{path.name}.{ts}.bak"
-            backup.write_text(path.read_text(encoding="utf-8"), encoding="utf-8")
+            # Byte copy: no decode/encode round-trip of the old contents
+            shutil.copyfile(path, backup)
             logger.info(f"Backup created: {backup}")
         except Exception as e:
             logger.warning(f"Could not backup {path}: {e}")
 
     def load_optional_text(self, path: Path) -> str:
-        return path.read_text(encoding="utf-8") if path.exists() else ""
+        text = _read_text_cached(path)
+        return text if text is not None else ""
 
-    def build_auto_doc_block(self, qa: QAReport) -> str:
-        now = datetime.utcnow().isoformat() + "Z"
+    def build_auto_doc_block(self, qa: QAReport, when: Optional[time.struct_time] = None) -> str:
+        now = time.strftime(ISO_UTC_FORMAT, when or time.gmtime())
         spec_text = self.load_optional_text(self.spec_path)
         plan_text = self.load_optional_text(self.plan_path)
 
@@ -158,76 +245,115 @@ class DocumentationAgent:
             except Exception:
                 plan_json = {}
 
-        objetivo = read_section_from_spec(spec_text, "Objetivo")
-        escopo_in = read_section_from_spec(spec_text, "Escopo incluído")
-        escopo_out = read_section_from_spec(spec_text, "Escopo excluído")
-        criterios = read_section_from_spec(spec_text, "Critérios de aceitação")
+        sections = parse_spec_sections(spec_text)
+        objetivo = sections.get("objetivo", "")
+        escopo_in = sections.get("escopo incluído", "")
+        escopo_out = sections.get("escopo excluído", "")
+        criterios = sections.get("critérios de aceitação", "")
 
         plan_steps = plan_steps_from_json(plan_json)
 
-        lines = [
-            AUTO_DOC_BEGIN,
-            "",
-            f"## 📚 Documentation Status {emoji_for_status(qa.status)}",
-            "",
-            f"- Task: `{qa.task_id}`",
-            f"- Status: `{qa.status}`",
-            f"- Tests: `{qa.passed}` passed, `{qa.failed}` failed",
-            f"- Coverage: `{qa.coverage}%`",
-            f"- Lint errors: `{qa.lint_errors}` | Type errors: `{qa.type_errors}`",
-            f"- Last updated: `{now}`",
-            "",
-            "### Next Actions",
-            bullet_list(qa.next_actions),
-        ]
-
-        if objetivo:
-            lines += ["", "### Objetivo (Spec)", objetivo]
-        if escopo_in:
-            lines += ["", "### Escopo incluído (Spec)", escopo_in]
-        if escopo_out:
-            lines += ["", "### Escopo excluído (Spec)", escopo_out]
-        if criterios:
-            lines += ["", "### Critérios de aceitação (Spec)", criterios]
-        if plan_steps:
-            lines += ["", "### Plano (Steps)", bullet_list(plan_steps)]
+        optional_sections = (
+            ("Objetivo (Spec)", objetivo),
+            ("Escopo incluído (Spec)", escopo_in),
+            ("Escopo excluído (Spec)", escopo_out),
+            ("Critérios de aceitação (Spec)", criterios),
+            ("Plano (Steps)", bullet_list(plan_steps) if plan_steps else ""),
+        )
 
-        lines += ["", AUTO_DOC_END, ""]
-        return "\n".join(lines)
+        return _AUTO_DOC_TEMPLATE.format_map({
+            "emoji": emoji_for_status(qa.status),
+            "task_id": qa.task_id,
+            "status": qa.status,
+            "passed": qa.passed,
+            "failed": qa.failed,
+            "coverage": qa.coverage,
+            "lint_errors": qa.lint_errors,
+            "type_errors": qa.type_errors,
+            "now": now,
+            "next_actions": bullet_list(qa.next_actions),
+            "sections": "".join(
+                _SECTION_TEMPLATE.format(title=title, body=body)
+                for title, body in optional_sections
+                if body
+            ),
+        })
 
     def upsert_auto_block(self, base_text: str, block: str) -> str:
         if AUTO_DOC_BEGIN in base_text and AUTO_DOC_END in base_text:
-            # Replace content between markers
-            pattern = re.compile(
-                re.escape(AUTO_DOC_BEGIN) + r"[\s\S]*?" + re.escape(AUTO_DOC_END),
-                re.MULTILINE,
-            )
-            return pattern.sub(block, base_text)
+            # Replace content between markers; the block is literal text, not a
+            # replacement template, and there is one block per document
+            return AUTO_BLOCK_RE.sub(lambda _: block, base_text, count=1)
         # Append block
         sep = "\n\n" if base_text and not base_text.endswith("\n") else "\n"
         return base_text + sep + block
 
-    async def _maybe_broadcast(self, qa: QAReport) -> None:
+    async def _maybe_broadcast(self, qa: QAReport, when: Optional[time.struct_time] = None) -> None:
         url = os.environ.get("DASHBOARD_URL")
         if not url or not websockets:  # pragma: no cover - optional path
             return
         try:
-            async with websockets.connect(url) as ws:  # type: ignore
-                payload = {
-                    "type": "doc_update",
-                    "task": qa.task_id,
-                    "status": qa.status,
-                    "passed": qa.passed,
-                    "failed": qa.failed,
-                    "coverage": qa.coverage,
-                    "lint_errors": qa.lint_errors,
-                    "type_errors": qa.type_errors,
-                    "timestamp": datetime.utcnow().isoformat() + "Z",
-                }
-                await ws.send(json.dumps(payload))
+            payload = {
+                "type": "doc_update",
+                "task": qa.task_id,
+                "status": qa.status,
+                "passed": qa.passed,
+                "failed": qa.failed,
+                "coverage": qa.coverage,
+                "lint_errors": qa.lint_errors,
+                "type_errors": qa.type_errors,
+                "timestamp": time.strftime(ISO_UTC_FORMAT, when or time.gmtime()),
+            }
+            message = _dumps(payload)
+            if self._ws is not None:
+                # The loop only runs during broadcasts: let it process a close
+                # the dashboard sent since the last one before reusing the socket
+                await asyncio.sleep(0)
+                if self._ws.state is not State.OPEN:
+                    self._ws = None
+            if self._ws is None:
+                self._ws = await websockets.connect(url, ping_interval=20)  # type: ignore
+            try:
+                await self._ws.send(message)
+            except websockets.exceptions.ConnectionClosed:  # type: ignore
+                # Dropped since the last broadcast: reconnect once and resend
+                self._ws = await websockets.connect(url, ping_interval=20)  # type: ignore
+                await self._ws.send(message)
         except Exception as e:  # pragma: no cover - network dependent
+            # Reconnect on the next broadcast
+            self._ws = None
             logger.warning(f"Dashboard broadcast failed: {e}")
 
+    def notify_dashboard(self, qa: QAReport, when: Optional[time.struct_time] = None) -> None:
+        """Best-effort doc_update broadcast over the agent's persistent connection."""
+        if not os.environ.get("DASHBOARD_URL") or not websockets:
+            return
+        try:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self._maybe_broadcast(qa, when))
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        """Closes the dashboard connection and its event loop."""
+        if self._loop is None:
+            return
+        try:
+            if self._ws is not None:
+                self._loop.run_until_complete(self._ws.close())
+        except Exception:  # pragma: no cover - network dependent
+            pass
+        finally:
+            self._ws = None
+            self._loop.close()
+            self._loop = None
+
+    def _write_output(self, dest_path: Path, content: str, when: time.struct_time) -> None:
+        self.backup_file(dest_path, when)
+        dest_path.write_text(content, encoding="utf-8")
+        logger.info(f"Updated: {dest_path}")
+
     def run(self, dry_run: bool = False) -> Dict[str, str]:
         """Process templates and update documentation.
 
@@ -236,7 +362,9 @@ class DocumentationAgent:
         self.ensure_templates()
 
         qa = QAReport.load(self.qa_path)
-        block = self.build_auto_doc_block(qa)
+        # One timestamp per run, shared by the block, the backups and the broadcast
+        when = time.gmtime()
+        block = self.build_auto_doc_block(qa, when)
 
         outputs: Dict[str, str] = {}
         files = [
@@ -245,23 +373,22 @@ class DocumentationAgent:
             (self.templates_dir / "USAGE.template.md", self.usage_path),
         ]
 
-        for template_path, dest_path in files:
-            base = template_path.read_text(encoding="utf-8") if template_path.exists() else ""
-            updated = self.upsert_auto_block(base, block)
-            outputs[str(dest_path)] = updated
+        # Same block for every file: read all templates, then write all outputs
+        with ThreadPoolExecutor(max_workers=len(files)) as executor:
+            bases = executor.map(self.load_optional_text, [t for t, _ in files])
+            for (_, dest_path), base in zip(files, bases):
+                outputs[str(dest_path)] = self.upsert_auto_block(base, block)
+
             if not dry_run:
-                self.backup_file(dest_path)
-                dest_path.parent.mkdir(parents=True, exist_ok=True)
-                dest_path.write_text(updated, encoding="utf-8")
-                logger.info(f"Updated: {dest_path}")
+                for parent in {dest_path.parent for _, dest_path in files}:
+                    parent.mkdir(parents=True, exist_ok=True)
+                # Consume results so write errors propagate as before
+                dests = [dest_path for _, dest_path in files]
+                contents = [outputs[str(d)] for d in dests]
+                list(executor.map(self._write_output, dests, contents, [when] * len(dests)))
 
         # Best-effort dashboard notify
-        try:
-            import asyncio
-
-            asyncio.run(self._maybe_broadcast(qa))
-        except Exception:
-            pass
+        self.notify_dashboard(qa, when)
 
         return outputs
 
@@ -289,6 +416,8 @@ def main(argv: Optional[List[str]] = None) -> int:
     except Exception as e:
         logger.error(f"Documentation agent failed: {e}")
         return 1
+    finally:
+        agent.close()
 
 
 if __name__ == "__main__":
@@ -10,14 +10,29 @@ Automatically handles git operations when QA passes:
 - Handles rollback on failure
 """
 
+import copy
+import fnmatch
+import functools
 import json
 import logging
 import os
+import re
 import subprocess
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore
+
+try:
+    import pygit2  # type: ignore
+except ImportError:  # pragma: no cover - optional, falls back to the git CLI
+    pygit2 = None  # type: ignore
 
 # Configure logging
 logging.basicConfig(
@@ -51,6 +66,62 @@ DEFAULT_CONFIG: Dict = {
 }
 
 
+QA_REPORT_PATH = "reports/qa.json"
+
+# Parsed JSON files keyed by path, reused while (mtime_ns, size) is unchanged
+_JSON_CACHE: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+
+
+def _load_json(path: str) -> Any:
+    """Parse a JSON file (orjson on raw bytes when available), memoized by mtime.
+
+    The returned object is shared between callers and must not be mutated.
+    """
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _JSON_CACHE.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with open(path, 'rb') as f:
+        data = orjson.loads(f.read()) if orjson is not None else json.load(f)
+    _JSON_CACHE[path] = (key, data)
+    return data
+
+
+# (epoch second, formatted timestamp) for operation log records
+_log_ts_cache: Tuple[int, str] = (0, "")
+
+
+def _log_timestamp() -> str:
+    """Local ISO timestamp at second resolution, formatted at most once per second"""
+    global _log_ts_cache
+    second = int(time.time())
+    if second != _log_ts_cache[0]:
+        _log_ts_cache = (second, datetime.fromtimestamp(second).isoformat())
+    return _log_ts_cache[1]
+
+
+@functools.lru_cache(maxsize=8)
+def _compile_excludes(patterns: Tuple[str, ...]) -> Optional["re.Pattern[str]"]:
+    """Compile glob exclude patterns into a single alternation, shared by agents"""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(pattern)})" for pattern in patterns))
+
+
+def _parse_numstat(output: bytes) -> Iterator[Tuple[int, Tuple[str, ...]]]:
+    """Yield (lines added, paths) from `git diff --numstat -z` output"""
+    fields = iter(output.split(b'\0'))
+    for record in fields:
+        if not record:
+            continue
+        added, _deleted, path = record.split(b'\t', 2)
+        # Renames leave the path empty and follow with the old and new paths
+        paths = (path,) if path else (next(fields, b''), next(fields, b''))
+        # Binary files report '-' instead of line counts
+        yield (int(added) if added.isdigit() else 0), tuple(os.fsdecode(p) for p in paths)
+
+
 class GitAgent:
     """Agent for automated git operations in Maestro pipeline"""
     
@@ -58,8 +129,27 @@ class GitAgent:
         """Initialize Git Agent with configuration"""
         self.config_path = config_path
         self.config = self._load_config()
+        # Compiled once per pattern set and shared by agents; matched per staged path
+        self._exclude_re = _compile_excludes(
+            tuple(sorted(self.config['security']['exclude_patterns']))
+        )
+        # In-process repository for read-only queries (None: use the git CLI)
+        self._repo = self._open_repo()
+        # GitHub CLI availability, probed on first use
+        self._gh_available: Optional[bool] = None
         self._setup_logging()
         
+    def _open_repo(self):
+        """Open the current repository with pygit2 when it is installed"""
+        if pygit2 is None:
+            return None
+        try:
+            path = pygit2.discover_repository(os.getcwd())
+            return pygit2.Repository(path) if path else None
+        except Exception as e:
+            logger.debug(f"pygit2 unavailable for this repository: {e}")
+            return None
+        
     def _load_config(self) -> Dict:
         """Load configuration from JSON file"""
         def merge_defaults(cfg: Dict) -> Dict:
@@ -83,12 +173,12 @@ class GitAgent:
             return merged
 
         try:
-            with open(self.config_path, 'r') as f:
-                cfg = json.load(f)
-                if not isinstance(cfg, dict):
-                    logger.warning("Config content is not a dict; using defaults")
-                    return DEFAULT_CONFIG.copy()
-                return merge_defaults(cfg)
+            cfg = _load_json(self.config_path)
+            if not isinstance(cfg, dict):
+                logger.warning("Config content is not a dict; using defaults")
+                return DEFAULT_CONFIG.copy()
+            # The parse is cached; keep this agent's config independent of it
+            return merge_defaults(copy.deepcopy(cfg))
         except (FileNotFoundError, json.JSONDecodeError, TypeError) as e:
             logger.warning(f"Using default config due to error reading {self.config_path}: {e}")
             return DEFAULT_CONFIG.copy()
@@ -96,20 +186,29 @@ class GitAgent:
     def _setup_logging(self):
         """Setup structured logging"""
         log_config = self.config.get('logging', {})
-        log_file = log_config.get('log_file', 'logs/git-automation.log')
+        log_path = Path(log_config.get('log_file', 'logs/git-automation.log')).resolve()
+        
+        # Agents share the module logger: the directory and handler exist already
+        # if an earlier agent set up the same log file
+        if any(
+            isinstance(handler, logging.FileHandler)
+            and Path(handler.baseFilename) == log_path
+            for handler in logger.handlers
+        ):
+            return
         
         # Ensure log directory exists
-        Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+        log_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Add file handler
-        file_handler = logging.FileHandler(log_file)
+        file_handler = logging.FileHandler(log_path)
         file_handler.setLevel(logging.INFO)
         logger.addHandler(file_handler)
     
     def _log_operation(self, operation: str, task_id: str, status: str, **kwargs):
         """Log structured operation data"""
         log_data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _log_timestamp(),
             "task_id": task_id,
             "operation": operation,
             "status": status,
@@ -117,71 +216,52 @@ class GitAgent:
         }
         logger.info(f"Git operation: {json.dumps(log_data)}")
     
+    def _load_qa_report(self) -> Dict:
+        """Read and parse reports/qa.json (cached while the file is unchanged)"""
+        return _load_json(QA_REPORT_PATH)
+    
     def check_qa_status(self, task_id: str) -> str:
         """Check QA status from reports/qa.json"""
-        qa_file = f"reports/qa.json"
-        
-        if not os.path.exists(qa_file):
-            logger.warning(f"QA report not found: {qa_file}")
-            return "unknown"
-        
         try:
-            with open(qa_file, 'r') as f:
-                qa_data = json.load(f)
-                status = qa_data.get('status', 'unknown')
-                logger.info(f"QA status for {task_id}: {status}")
-                return status
+            qa_data = self._load_qa_report()
+        except FileNotFoundError:
+            logger.warning(f"QA report not found: {QA_REPORT_PATH}")
+            return "unknown"
         except (json.JSONDecodeError, KeyError) as e:
             logger.error(f"Error reading QA report: {e}")
             return "unknown"
+        
+        status = qa_data.get('status', 'unknown')
+        logger.info(f"QA status for {task_id}: {status}")
+        return status
     
     def validate_changes(self, task_id: str) -> bool:
         """Validate changes before committing"""
         try:
-            # Check for secrets in staged files
+            # Staged file names and per-file line counts in one call
             result = subprocess.run(
-                ['git', 'diff', '--cached', '--name-only'],
-                capture_output=True, text=True
+                ['git', 'diff', '--cached', '--numstat', '-z'],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
             )
             
             if result.returncode != 0:
                 logger.error("Failed to get staged files")
                 return False
             
-            staged_files = result.stdout.strip().split('\n') if result.stdout else []
-            
-            # Check for excluded patterns
-            exclude_patterns = self.config['security']['exclude_patterns']
-            if staged_files:
-                import fnmatch
-                for file_path in staged_files:
-                    # Support glob-style patterns like secrets/*, *.key, etc.
-                    if any(fnmatch.fnmatch(file_path, pattern) for pattern in exclude_patterns):
+            # Check for secrets in staged files (glob-style patterns like secrets/*, *.key)
+            lines_added = 0
+            for added, paths in _parse_numstat(result.stdout):
+                for file_path in paths:
+                    if self._exclude_re is not None and self._exclude_re.match(file_path):
                         logger.error(f"File matches excluded pattern: {file_path}")
                         return False
+                lines_added += added
             
             # Check diff size
-            result = subprocess.run(
-                ['git', 'diff', '--cached', '--stat'],
-                capture_output=True, text=True
-            )
-            
-            if result.returncode == 0:
-                # Count lines in diff
-                lines_added = 0
-                for line in result.stdout.split('\n'):
-                    if '|' in line and 'insertions' in line:
-                        parts = line.split('|')
-                        if len(parts) > 1:
-                            try:
-                                lines_added = int(parts[1].strip().split()[0])
-                            except (ValueError, IndexError):
-                                pass
-                
-                max_lines = self.config['security']['max_diff_lines']
-                if lines_added > max_lines:
-                    logger.error(f"Diff too large: {lines_added} lines (max: {max_lines})")
-                    return False
+            max_lines = self.config['security']['max_diff_lines']
+            if lines_added > max_lines:
+                logger.error(f"Diff too large: {lines_added} lines (max: {max_lines})")
+                return False
             
             return True
             
@@ -189,24 +269,59 @@ class GitAgent:
             logger.error(f"Error validating changes: {e}")
             return False
     
+    def _branch_exists(self, branch_name: str) -> bool:
+        if self._repo is not None:
+            return branch_name in self._repo.branches.local
+        result = subprocess.run(
+            ['git', 'rev-parse', '--verify', branch_name],
+            capture_output=True
+        )
+        return result.returncode == 0
+    
+    def _has_staged_changes(self) -> bool:
+        if self._repo is not None:
+            # Pick up what `git add` just staged
+            self._repo.index.read()
+            if self._repo.head_is_unborn:
+                # No commits yet: everything in the index is staged
+                return len(self._repo.index) > 0
+            return len(self._repo.diff('HEAD', cached=True)) > 0
+        result = subprocess.run(
+            ['git', 'diff', '--cached', '--quiet'],
+            capture_output=True
+        )
+        return result.returncode != 0
+    
+    def _head_commit(self) -> str:
+        if self._repo is not None and not self._repo.head_is_unborn:
+            return str(self._repo.head.target)
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True
+        )
+        return result.stdout.strip()
+    
     def create_feature_branch(self, task_id: str) -> str:
         """Create feature branch for task"""
         branch_prefix = self.config['git']['branch_prefix']
         branch_name = f"{branch_prefix}{task_id}"
         
         try:
-            # Check if branch already exists
+            # New branches are the common case: create directly, and only check
+            # whether the branch already exists when git refuses
             result = subprocess.run(
-                ['git', 'rev-parse', '--verify', branch_name],
-                capture_output=True
+                ['git', 'checkout', '-b', branch_name],
+                capture_output=True, text=True
             )
-            
             if result.returncode == 0:
+                logger.info(f"Created new branch: {branch_name}")
+            elif self._branch_exists(branch_name):
                 logger.info(f"Branch {branch_name} already exists, switching to it")
                 subprocess.run(['git', 'checkout', branch_name], check=True)
             else:
-                logger.info(f"Creating new branch: {branch_name}")
-                subprocess.run(['git', 'checkout', '-b', branch_name], check=True)
+                raise subprocess.CalledProcessError(
+                    result.returncode, result.args, result.stdout, result.stderr
+                )
             
             self._log_operation("create_branch", task_id, "success", branch=branch_name)
             return branch_name
@@ -222,25 +337,22 @@ class GitAgent:
             # Stage all changes
             subprocess.run(['git', 'add', '.'], check=True)
             
-            # Check if there are changes to commit
+            # Commit changes (through git so commit hooks still run). An empty
+            # index is only checked for when git refuses to commit.
             result = subprocess.run(
-                ['git', 'diff', '--cached', '--quiet'],
-                capture_output=True
-            )
-            
-            if result.returncode == 0:
-                logger.info("No changes to commit")
-                return True
-            
-            # Commit changes
-            subprocess.run(['git', 'commit', '-m', message], check=True)
-            
-            # Get commit hash
-            result = subprocess.run(
-                ['git', 'rev-parse', 'HEAD'],
+                ['git', 'commit', '-m', message],
                 capture_output=True, text=True
             )
-            commit_hash = result.stdout.strip()
+            if result.returncode != 0:
+                if not self._has_staged_changes():
+                    logger.info("No changes to commit")
+                    return True
+                raise subprocess.CalledProcessError(
+                    result.returncode, result.args, result.stdout, result.stderr
+                )
+            
+            # Full hash on both the pygit2 and CLI paths
+            commit_hash = self._head_commit()
             
             self._log_operation(
                 "commit", task_id, "success", 
@@ -250,6 +362,8 @@ class GitAgent:
             
         except subprocess.CalledProcessError as e:
             logger.error(f"Failed to commit changes: {e}")
+            if e.stderr or e.output:
+                logger.error(e.stderr or e.output)
             self._log_operation("commit", task_id, "error", error=str(e))
             return False
     
@@ -270,9 +384,13 @@ class GitAgent:
     def create_pull_request(self, task_id: str, branch_name: str) -> Optional[str]:
         """Create Pull Request using GitHub CLI"""
         try:
-            # Check if gh CLI is available
-            result = subprocess.run(['gh', '--version'], capture_output=True)
-            if result.returncode != 0:
+            # Check if gh CLI is available (once per agent)
+            if self._gh_available is None:
+                result = subprocess.run(
+                    ['gh', '--version'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                )
+                self._gh_available = result.returncode == 0
+            if not self._gh_available:
                 logger.warning("GitHub CLI not available, skipping PR creation")
                 return None
             
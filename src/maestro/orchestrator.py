@@ -2,72 +2,310 @@
 Core orchestrator functionality for the Maestro pipeline.
 """
 
+import argparse
 import asyncio
-import json
+import functools
 import logging
 import os
-import time
-from datetime import datetime
+import shutil
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import websockets
+
+from .dashboard import dumps_message, run_event_loop
+from .pipeline import PipelineBuilder
 
 logger = logging.getLogger(__name__)
 
+STAGE_NAMES = ("planner", "coder", "integrator", "tester", "reporter")
+
+# Tasks each stage works on at once unless the caller says otherwise
+DEFAULT_CONCURRENCY = 4
+
+# Seconds between status snapshots pushed to the dashboard
+STATUS_PUSH_INTERVAL_S = 2.0
+
+# Stage events waiting for the dashboard writer; the oldest are dropped beyond this
+EVENT_QUEUE_SIZE = 64
+
+# Queued by _StatusMonitor.stop() to end the writer loop
+_STOP = object()
+
+
+class StageStatus:
+    """Status of one pipeline stage for one task.
+    
+    A slotted class rather than ``dataclass(slots=True)``, which needs
+    Python 3.10 while the project still supports 3.8. Item access
+    (``stage["status"]``, ``dict(stage)``) keeps working for callers of
+    ``Orchestrator.pipeline_status`` written against the old plain dicts.
+    """
+    
+    __slots__ = ("status", "progress", "error")
+    
+    def __init__(self, status: str = "waiting", progress: Optional[str] = None, error: Optional[str] = None):
+        self.status = status
+        self.progress = progress
+        self.error = error
+        
+    def __getitem__(self, key: str) -> Optional[str]:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+        
+    def __setitem__(self, key: str, value: Optional[str]) -> None:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+        
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return getattr(self, key) if key in self.__slots__ else default
+        
+    def keys(self) -> Tuple[str, ...]:
+        return self.__slots__
+        
+    def __repr__(self) -> str:
+        return f"StageStatus(status={self.status!r}, progress={self.progress!r}, error={self.error!r})"
+
+
+def _initial_status() -> Dict[str, StageStatus]:
+    return {name: StageStatus() for name in STAGE_NAMES}
+
+
+class _StatusMonitor:
+    """Background writer of orchestrator status to the dashboard.
+    
+    Runs beside the pipeline so stages never wait on the network: stages
+    publish events to a bounded queue that this writer drains into batch
+    frames, and a full snapshot goes out whenever ``interval`` seconds pass
+    without events, and once more when stopped.
+    """
+    
+    def __init__(self, orchestrator: "Orchestrator", interval: float = STATUS_PUSH_INTERVAL_S):
+        self._orchestrator = orchestrator
+        self._interval = interval
+        self._events: asyncio.Queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self._websocket = None
+        self._reader: Optional[asyncio.Future] = None
+        
+    def publish(self, event) -> None:
+        """Queue an event without blocking; the oldest one is dropped when full."""
+        if self._events.full():
+            self._events.get_nowait()
+        self._events.put_nowait(event)
+        
+    def stop(self) -> None:
+        """Ask run() to push a final snapshot and return."""
+        self.publish(_STOP)
+        
+    async def run(self) -> None:
+        """Write events and snapshots until stopped."""
+        try:
+            while True:
+                try:
+                    events = [await asyncio.wait_for(self._events.get(), self._interval)]
+                except asyncio.TimeoutError:
+                    await self._push(self._orchestrator._status_frame())
+                    continue
+                    
+                # Coalesce everything already queued into one frame
+                while not self._events.empty():
+                    events.append(self._events.get_nowait())
+                stopping = _STOP in events
+                events = [event for event in events if event is not _STOP]
+                if events:
+                    await self._push({"type": "batch", "events": events})
+                if stopping:
+                    await self._push(self._orchestrator._status_frame())
+                    return
+        finally:
+            await self._disconnect()
+            
+    async def _push(self, frame: Dict) -> None:
+        try:
+            if self._websocket is None:
+                self._websocket = await websockets.connect(self._orchestrator.dashboard_url)
+                # The dashboard broadcasts to us too; keep reading so it never blocks on us
+                self._reader = asyncio.ensure_future(self._discard_incoming(self._websocket))
+            await self._websocket.send(dumps_message(frame))
+        except Exception as e:
+            logger.warning("Could not push status to dashboard: %s", e)
+            await self._disconnect()
+            
+    @staticmethod
+    async def _discard_incoming(websocket) -> None:
+        try:
+            async for _ in websocket:
+                pass
+        except websockets.exceptions.ConnectionClosed:
+            pass
+            
+    async def _disconnect(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._websocket is not None:
+            websocket, self._websocket = self._websocket, None
+            try:
+                await websocket.close()
+            except Exception:
+                pass
+
 
 class Orchestrator:
     """Main orchestrator class for managing the AI-powered development pipeline."""
     
+    # (stage name, method running it), in pipeline order
+    _STAGES = (
+        ("planner", "_run_planner"),
+        ("coder", "_run_coder"),
+        ("integrator", "_run_integrator"),
+        ("tester", "_run_tester"),
+        ("reporter", "_run_reporter")
+    )
+    
     def __init__(self, project_root: str = ".", dashboard_url: Optional[str] = None):
-        self.project_root = Path(project_root)
+        self.project_root = Path(project_root).resolve()
+        self._issues_dir = self.project_root / "issues"
         self.dashboard_url = dashboard_url
         self.current_task = "demo"
-        self.pipeline_status = {
-            "planner": {"status": "waiting", "progress": None, "error": None},
-            "coder": {"status": "waiting", "progress": None, "error": None},
-            "integrator": {"status": "waiting", "progress": None, "error": None},
-            "tester": {"status": "waiting", "progress": None, "error": None},
-            "reporter": {"status": "waiting", "progress": None, "error": None}
-        }
+        self._monitor: Optional[_StatusMonitor] = None
+        # Task ids with an issues/<id>.md file, listed by reload_issues()
+        self._issue_ids: Optional[FrozenSet[str]] = None
+        # Stage status per task, so concurrent pipelines don't overwrite each other
+        self.task_status: Dict[str, Dict[str, StageStatus]] = {}
         self.metrics = {
             "totalTime": 0,
             "testsPassed": 0,
             "coverage": 0,
             "filesTouched": 0
         }
+        # Pipeline steps are bound once and reused by every run
+        self._stage_steps = [self._stage_step(name, getattr(self, method)) for name, method in self._STAGES]
+        
+    @property
+    def pipeline_status(self) -> Dict[str, StageStatus]:
+        """Stage status of the current task."""
+        return self.task_status.setdefault(self.current_task, _initial_status())
         
     async def run_pipeline(self, task: str) -> bool:
         """Run the complete pipeline for a given task."""
         self.current_task = task
-        logger.info(f"Starting pipeline for task: {task}")
+        return bool((await self.run_pipelines([task]))[0])
         
+    def reload_issues(self) -> FrozenSet[str]:
+        """List the issues directory once; tasks are then validated against it."""
         try:
-            # Validate environment
-            await self._validate_environment()
-            
-            # Run stages
-            stages = [
-                ("planner", self._run_planner),
-                ("coder", self._run_coder),
-                ("integrator", self._run_integrator),
-                ("tester", self._run_tester),
-                ("reporter", self._run_reporter)
-            ]
+            with os.scandir(self._issues_dir) as entries:
+                self._issue_ids = frozenset(
+                    entry.name[:-3] for entry in entries if entry.name.endswith(".md")
+                )
+        except FileNotFoundError:
+            self._issue_ids = frozenset()
+        except OSError as e:
+            # Unreadable issues directory: every task then fails validation
+            logger.error("Cannot list issues in %s: %s", self._issues_dir, e)
+            self._issue_ids = frozenset()
+        return self._issue_ids
+        
+    async def run_pipelines(self, tasks: List[str], concurrency: int = DEFAULT_CONCURRENCY) -> List[Optional[bool]]:
+        """Run the pipeline for several tasks concurrently.
+        
+        Tasks flow through the stages as a staged pipeline, so one task can be
+        testing while another is still planning; each stage works on up to
+        ``concurrency`` tasks at once. Results are aligned with ``tasks``.
+        """
+        self.reload_issues()
+        builder = PipelineBuilder().add_source(tasks).pipe(self._start_task, concurrency=concurrency)
+        for step in self._stage_steps:
+            builder.pipe(step, concurrency=concurrency)
             
-            for stage_name, stage_func in stages:
-                await self._run_stage(stage_name, stage_func)
+        monitor = None
+        if self.dashboard_url:
+            monitor = self._monitor = _StatusMonitor(self)
+            monitor_task = asyncio.ensure_future(monitor.run())
+        try:
+            results = await builder.build().run()
+        finally:
+            if monitor is not None:
+                self._monitor = None
+                monitor.stop()
+                await monitor_task
                 
-            logger.info(f"Pipeline completed successfully for task: {task}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Pipeline failed for task {task}: {e}")
-            return False
+        for task, result in zip(tasks, results):
+            if isinstance(result, Exception):
+                logger.error("Pipeline failed for task %s: %s", task, result)
+            elif result is not None:
+                logger.info("Pipeline completed successfully for task: %s", task)
+        return [None if result is None else not isinstance(result, Exception) for result in results]
+        
+    def _status_event(self, task: str, stages: Dict[str, StageStatus]) -> Dict:
+        """Dashboard pipeline_status event for some or all stages of a task."""
+        return {
+            "type": "pipeline_status",
+            "task": task,
+            "pipeline": {
+                name: {"status": stage.status, "progress": stage.progress, "error": stage.error}
+                for name, stage in stages.items()
+            },
+            "metrics": self.metrics
+        }
+        
+    def _status_frame(self) -> Dict:
+        """Snapshot of every task as one dashboard batch frame."""
+        return {
+            "type": "batch",
+            "events": [self._status_event(task, status) for task, status in self.task_status.items()]
+        }
+        
+    def _publish_stage(self, task: str, stage_name: str, stage: StageStatus) -> None:
+        """Hand a stage change to the dashboard writer, if one is running."""
+        if self._monitor is not None:
+            self._monitor.publish(self._status_event(task, {stage_name: stage}))
+        
+    async def _start_task(self, task: str) -> str:
+        """First pipeline step: reset the task's status and validate the environment."""
+        logger.info("Starting pipeline for task: %s", task)
+        self.task_status[task] = _initial_status()
+        await self._validate_environment(task)
+        return task
+        
+    def _stage_step(self, stage_name: str, stage_func):
+        """Wrap a stage once with its status tracking, so the pipeline can pass task ids through it."""
+        async def step(task: str) -> str:
+            logger.info("Starting stage: %s", stage_name)
+            stage = self.task_status[task][stage_name]
             
-    async def _validate_environment(self) -> None:
+            try:
+                stage.status = "running"
+                stage.progress = "0%"
+                self._publish_stage(task, stage_name, stage)
+                
+                await stage_func()
+                
+                stage.status = "completed"
+                stage.progress = "100%"
+                self._publish_stage(task, stage_name, stage)
+                logger.info("Stage completed: %s", stage_name)
+                
+            except Exception as e:
+                stage.status = "failed"
+                stage.error = str(e)
+                self._publish_stage(task, stage_name, stage)
+                logger.error("Stage failed: %s - %s", stage_name, e)
+                raise
+                
+            return task
+        return step
+        
+    async def _validate_environment(self, task: Optional[str] = None) -> None:
         """Validate that all required tools and files are available."""
         # Check if issue exists
-        issue_file = self.project_root / "issues" / f"{self.current_task}.md"
-        if not issue_file.exists():
+        task = task or self.current_task
+        issue_ids = self._issue_ids if self._issue_ids is not None else self.reload_issues()
+        if task not in issue_ids:
+            issue_file = self._issues_dir / f"{task}.md"
             raise FileNotFoundError(f"Issue file not found: {issue_file}")
             
         # Check if CLIs are available
@@ -78,31 +316,12 @@ class Orchestrator:
                 
         logger.info("Environment validation passed")
         
-    def _command_exists(self, command: str) -> bool:
-        """Check if a command exists in the system PATH."""
-        import shutil
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _command_exists(command: str) -> bool:
+        """Check if a command exists in the system PATH (resolved once per process)."""
         return shutil.which(command) is not None
         
-    async def _run_stage(self, stage_name: str, stage_func) -> None:
-        """Run a single pipeline stage with error handling."""
-        logger.info(f"Starting stage: {stage_name}")
-        
-        try:
-            self.pipeline_status[stage_name]["status"] = "running"
-            self.pipeline_status[stage_name]["progress"] = "0%"
-            
-            await stage_func()
-            
-            self.pipeline_status[stage_name]["status"] = "completed"
-            self.pipeline_status[stage_name]["progress"] = "100%"
-            logger.info(f"Stage completed: {stage_name}")
-            
-        except Exception as e:
-            self.pipeline_status[stage_name]["status"] = "failed"
-            self.pipeline_status[stage_name]["error"] = str(e)
-            logger.error(f"Stage failed: {stage_name} - {e}")
-            raise
-            
     async def _run_planner(self) -> None:
         """Run the planning stage with Gemini CLI."""
         # Simulate planning stage
@@ -134,16 +353,21 @@ class Orchestrator:
         logger.info("Reporting stage completed")
 
 
-def main():
-    """Main entry point for the orchestrator."""
-    import argparse
-    
+def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Maestro Orchestrator")
-    parser.add_argument("task", help="Task ID to execute")
+    parser.add_argument("tasks", nargs="+", help="Task ID(s) to execute")
     parser.add_argument("--dashboard-url", help="Dashboard WebSocket URL")
     parser.add_argument("--verbose", "-v", action="store_true", help="Verbose logging")
-    
-    args = parser.parse_args()
+    return parser
+
+
+# Built once and reused by every main() call
+_PARSER = _build_parser()
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main entry point for the orchestrator."""
+    args = _PARSER.parse_args(argv)
     
     # Configure logging
     level = logging.DEBUG if args.verbose else logging.INFO
@@ -153,10 +377,10 @@ def main():
     orchestrator = Orchestrator(dashboard_url=args.dashboard_url)
     
     async def run():
-        success = await orchestrator.run_pipeline(args.task)
-        return 0 if success else 1
+        results = await orchestrator.run_pipelines(args.tasks)
+        return 0 if all(results) else 1
         
-    return asyncio.run(run())
+    return run_event_loop(run())
 
 
 if __name__ == "__main__":
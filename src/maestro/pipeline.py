@@ -0,0 +1,109 @@
+"""
+Staged asynchronous pipeline for pushing many items through a chain of steps.
+
+Stages are connected by bounded queues and each stage runs its own pool of
+workers, so different items occupy different stages at the same time and
+throughput is limited by the slowest stage rather than the sum of all stages.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+StageFunc = Callable[[Any], Awaitable[Any]]
+
+# Items allowed to wait between two stages before upstream workers block
+DEFAULT_QUEUE_SIZE = 16
+
+# End-of-input marker, one per downstream worker
+_DONE = object()
+
+
+class PipelineBuilder:
+    """Fluent builder: ``PipelineBuilder().add_source(items).pipe(f, concurrency=2).build()``."""
+
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._source: Optional[List[Any]] = None
+        self._stages: List[Tuple[StageFunc, int]] = []
+
+    def add_source(self, items: Iterable[Any]) -> "PipelineBuilder":
+        """Set the items fed into the first stage."""
+        self._source = list(items)
+        return self
+
+    def pipe(self, func: StageFunc, concurrency: int = 1) -> "PipelineBuilder":
+        """Append a stage; its output is the input of the next stage."""
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+        self._stages.append((func, concurrency))
+        return self
+
+    def build(self) -> "Pipeline":
+        """Create the pipeline described so far."""
+        if self._source is None:
+            raise ValueError("Pipeline has no source; call add_source() first")
+        return Pipeline(self._source, self._stages, self.queue_size)
+
+
+class Pipeline:
+    """A built pipeline; call ``run()`` once to process the source items."""
+
+    def __init__(self, source: List[Any], stages: List[Tuple[StageFunc, int]], queue_size: int):
+        self._source = source
+        self._stages = stages
+        self._queue_size = queue_size
+
+    async def run(self) -> List[Any]:
+        """Process every source item and return the results in source order.
+
+        An item whose stage raises is dropped from the remaining stages and
+        the exception takes its place in the results.
+        """
+        results: List[Any] = [None] * len(self._source)
+        queues = [asyncio.Queue(maxsize=self._queue_size) for _ in range(len(self._stages) + 1)]
+        # Workers reading each queue; the sink reads the last one alone
+        readers = [concurrency for _, concurrency in self._stages] + [1]
+
+        async def feed() -> None:
+            for entry in enumerate(self._source):
+                await queues[0].put(entry)
+            for _ in range(readers[0]):
+                await queues[0].put(_DONE)
+
+        async def stage(index: int) -> None:
+            func, concurrency = self._stages[index]
+            inbox, outbox = queues[index], queues[index + 1]
+
+            async def worker() -> None:
+                while True:
+                    entry = await inbox.get()
+                    if entry is _DONE:
+                        return
+                    position, item = entry
+                    try:
+                        item = await func(item)
+                    except Exception as e:
+                        results[position] = e
+                        continue
+                    await outbox.put((position, item))
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            for _ in range(readers[index + 1]):
+                await outbox.put(_DONE)
+
+        async def sink() -> None:
+            while True:
+                entry = await queues[-1].get()
+                if entry is _DONE:
+                    return
+                position, item = entry
+                results[position] = item
+
+        tasks = [asyncio.ensure_future(feed()), asyncio.ensure_future(sink())]
+        tasks += [asyncio.ensure_future(stage(index)) for index in range(len(self._stages))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return results
@@ -0,0 +1,25 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+
+def pytest_configure(config):
+    # Make orchestrator/ scripts (e.g. write_qa) importable, once per session
+    orchestrator_dir = str(Path(__file__).parent.parent / "orchestrator")
+    if orchestrator_dir not in sys.path:
+        sys.path.insert(0, orchestrator_dir)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Turn time.sleep into a plain recorder for the agent tests.
+
+    Modules whose agents poll apply it to every test with
+    ``pytestmark = pytest.mark.usefixtures("sleeps")``; tests that request
+    it get the list of requested durations to assert that nothing polled.
+    """
+    recorded = []
+    monkeypatch.setattr(time, "sleep", recorded.append)
+    return recorded
@@ -4,14 +4,50 @@ Teste de fumaça para o orquestrador "magro".
 Verifica se os componentes básicos estão funcionando.
 """
 
+import functools
 import json
 import os
+import stat
 import sys
 from pathlib import Path
+from typing import FrozenSet
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - aceleração opcional
+    orjson = None  # type: ignore
+
+
+def _loads(data: bytes):
+    """Faz o parse de JSON com orjson quando instalado; ambos levantam ValueError."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@functools.lru_cache(maxsize=None)
+def _existing(root: str) -> FrozenSet[str]:
+    """Nomes presentes em ``root``, lidos com um único scandir.
+
+    O cache vale para uma verificação: cada teste o limpa ao começar, para
+    enxergar o que foi criado depois (ex.: ``logs/`` criado pelos agentes).
+    """
+    try:
+        with os.scandir(root) as entries:
+            return frozenset(entry.name for entry in entries)
+    except FileNotFoundError:
+        return frozenset()
+
+
+def _exists(path: str) -> bool:
+    """Equivalente a ``Path(path).exists()`` usando a listagem em cache do diretório pai."""
+    parent, _, name = path.rpartition("/")
+    return name in _existing(os.path.abspath(parent or "."))
 
 
 def test_directory_structure():
     """Testa se a estrutura de diretórios está correta."""
+    _existing.cache_clear()
     required_dirs = [
         "issues",
         "handoff", 
@@ -26,7 +62,7 @@ def test_directory_structure():
     ]
     
     for dir_name in required_dirs:
-        if not Path(dir_name).exists():
+        if not _exists(dir_name):
             print(f"❌ Diretório não encontrado: {dir_name}")
             return False
         print(f"✅ Diretório encontrado: {dir_name}")
@@ -36,6 +72,7 @@ def test_directory_structure():
 
 def test_template_files():
     """Testa se os arquivos de template estão presentes."""
+    _existing.cache_clear()
     required_files = [
         "issues/TEMPLATE.md",
         "handoff/plan.template.json",
@@ -44,7 +81,7 @@ def test_template_files():
     ]
     
     for file_path in required_files:
-        if not Path(file_path).exists():
+        if not _exists(file_path):
             print(f"❌ Template não encontrado: {file_path}")
             return False
         print(f"✅ Template encontrado: {file_path}")
@@ -60,12 +97,15 @@ def test_orchestrator_scripts():
     ]
     
     for script in scripts:
-        script_path = Path(script)
-        if not script_path.exists():
+        try:
+            mode = os.stat(script).st_mode
+        except FileNotFoundError:
             print(f"❌ Script não encontrado: {script}")
             return False
         
-        if not os.access(script_path, os.X_OK):
+        # os.access considera o bit que vale para o usuário atual (dono, grupo
+        # ou outros), não qualquer bit de execução
+        if not (stat.S_ISREG(mode) and os.access(script, os.X_OK)):
             print(f"❌ Script não é executável: {script}")
             return False
         
@@ -76,23 +116,28 @@ def test_orchestrator_scripts():
 
 def test_config_files():
     """Testa se os arquivos de configuração estão presentes e válidos."""
+    _existing.cache_clear()
     config_files = [
         "orchestrator/config.json",
         "Makefile"
     ]
     
     for config_file in config_files:
-        if not Path(config_file).exists():
+        if not _exists(config_file):
             print(f"❌ Configuração não encontrada: {config_file}")
             return False
         
         # Testa se JSON é válido
         if config_file.endswith('.json'):
+            data = Path(config_file).read_bytes()
+            # Configurações são objetos ou listas; rejeita o resto sem chamar o parser
+            if data.lstrip()[:1] not in (b"{", b"["):
+                print(f"❌ JSON inválido: {config_file}")
+                return False
             try:
-                with open(config_file, 'r') as f:
-                    json.load(f)
+                _loads(data)
                 print(f"✅ JSON válido: {config_file}")
-            except json.JSONDecodeError:
+            except ValueError:
                 print(f"❌ JSON inválido: {config_file}")
                 return False
         else:
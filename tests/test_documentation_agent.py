@@ -3,7 +3,13 @@ from pathlib import Path
 
 import pytest
 
-from src.maestro.documentation_agent import DocumentationAgent, AUTO_DOC_BEGIN, AUTO_DOC_END
+from src.maestro import documentation_agent
+from src.maestro.documentation_agent import DocumentationAgent, QAReport, AUTO_DOC_BEGIN, AUTO_DOC_END
+
+
+# Minimal handoff payloads, serialized once at import
+MINIMAL_PLAN_JSON = json.dumps({"title": "t", "steps": []})
+MINIMAL_QA_JSON = json.dumps({"task_id": "t", "passed": 0, "failed": 0, "coverage": 0, "lint_errors": 0, "type_errors": 0, "status": "pass", "next_actions": []})
 
 
 def write_tmp_file(path: Path, content: str) -> None:
@@ -74,9 +80,9 @@ def test_agent_bootstraps_templates_from_existing_docs(tmp_path: Path):
     write_tmp_file(project / "docs" / "USAGE.md", "# Usage\n")
 
     # Minimal plan/spec/qa
-    write_tmp_file(project / "handoff" / "plan.json", json.dumps({"title": "t", "steps": []}))
+    write_tmp_file(project / "handoff" / "plan.json", MINIMAL_PLAN_JSON)
     write_tmp_file(project / "handoff" / "spec.md", "# Spec\n")
-    write_tmp_file(project / "reports" / "qa.json", json.dumps({"task_id": "t", "passed": 0, "failed": 0, "coverage": 0, "lint_errors": 0, "type_errors": 0, "status": "pass", "next_actions": []}))
+    write_tmp_file(project / "reports" / "qa.json", MINIMAL_QA_JSON)
 
     agent = DocumentationAgent(project)
     agent.run(dry_run=False)
@@ -91,3 +97,74 @@ def test_agent_bootstraps_templates_from_existing_docs(tmp_path: Path):
     assert AUTO_DOC_BEGIN in (project / "docs" / "USER_MANUAL.md").read_text(encoding="utf-8")
     assert AUTO_DOC_BEGIN in (project / "docs" / "USAGE.md").read_text(encoding="utf-8")
 
+
+
+def test_qa_report_reloaded_after_change(tmp_path: Path):
+    qa_path = tmp_path / "reports" / "qa.json"
+    write_tmp_file(qa_path, json.dumps({"task_id": "first", "status": "pass"}))
+    assert QAReport.load(qa_path).task_id == "first"
+
+    # Rewriting the report must invalidate the cached parse
+    write_tmp_file(qa_path, json.dumps({"task_id": "second-run", "status": "fail"}))
+    report = QAReport.load(qa_path)
+    assert report.task_id == "second-run"
+    assert report.status == "fail"
+
+
+def test_upsert_auto_block_replaces_existing_block_literally(tmp_path: Path):
+    agent = DocumentationAgent(tmp_path)
+    base = f"# Doc\n\n{AUTO_DOC_BEGIN}\nold\n{AUTO_DOC_END}\n\nManual notes\n"
+    block = f"{AUTO_DOC_BEGIN}\n- Fix C:\\new\\tests\n{AUTO_DOC_END}"
+
+    updated = agent.upsert_auto_block(base, block)
+
+    assert "old" not in updated
+    assert "C:\\new\\tests" in updated
+    assert updated.endswith("\n\nManual notes\n")
+
+
+def test_broadcast_reconnects_after_connection_drop(tmp_path: Path, monkeypatch):
+    websockets = pytest.importorskip("websockets")
+    from websockets.protocol import State
+
+    class FakeConnection:
+        def __init__(self):
+            self.sent = []
+            self.state = State.OPEN
+            self.dropped = False
+
+        async def send(self, message):
+            if self.dropped:
+                raise websockets.exceptions.ConnectionClosed(None, None)
+            self.sent.append(message)
+
+        async def close(self):
+            pass
+
+    connections = []
+
+    async def connect(url, **kwargs):
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    monkeypatch.setenv("DASHBOARD_URL", "ws://dashboard")
+    monkeypatch.setattr(documentation_agent.websockets, "connect", connect)
+    write_tmp_file(tmp_path / "reports" / "qa.json", MINIMAL_QA_JSON)
+    qa = QAReport.load(tmp_path / "reports" / "qa.json")
+    agent = DocumentationAgent(tmp_path)
+    try:
+        agent.notify_dashboard(qa)
+        agent.notify_dashboard(qa)
+        assert len(connections) == 1  # reused while open
+
+        # Closed by the dashboard between broadcasts
+        connections[0].state = State.CLOSED
+        agent.notify_dashboard(qa)
+        # Dropped without the close being seen yet: the send fails
+        connections[1].dropped = True
+        agent.notify_dashboard(qa)
+    finally:
+        agent.close()
+
+    assert [len(c.sent) for c in connections] == [2, 1, 1]
+    assert json.loads(connections[2].sent[0])["type"] == "doc_update"
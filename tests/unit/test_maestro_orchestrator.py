@@ -0,0 +1,141 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.maestro import orchestrator
+from src.maestro.dashboard import loads_message
+from src.maestro.orchestrator import EVENT_QUEUE_SIZE, Orchestrator, StageStatus, _StatusMonitor
+
+SNAPSHOT = {"type": "snapshot"}
+
+
+@pytest.fixture
+def instant_stages(monkeypatch):
+    """Stages that finish at once, with every required CLI reported present."""
+    async def done(self):
+        pass
+
+    for _, method in Orchestrator._STAGES:
+        monkeypatch.setattr(Orchestrator, method, done)
+    monkeypatch.setattr(Orchestrator, "_command_exists", staticmethod(lambda command: True))
+
+
+class FakeWebSocket:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.sent = []
+        self.closed = False
+        self._incoming = asyncio.Event()
+
+    async def send(self, data):
+        if self.fail:
+            raise ConnectionResetError("dashboard went away")
+        self.sent.append(loads_message(data))
+
+    async def close(self):
+        self.closed = True
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await self._incoming.wait()
+        raise StopAsyncIteration
+
+
+@pytest.fixture
+def sockets(monkeypatch):
+    """Sockets handed out by websockets.connect; tests queue them up front."""
+    queued = []
+    opened = []
+
+    async def connect(url):
+        opened.append(queued.pop(0))
+        return opened[-1]
+
+    monkeypatch.setattr(orchestrator.websockets, "connect", connect)
+    return SimpleNamespace(queued=queued, opened=opened)
+
+
+def run_monitor(publish):
+    """Run a monitor after publish(monitor) has queued its events and stopped it."""
+    async def main():
+        monitor = _StatusMonitor(SimpleNamespace(dashboard_url="ws://dashboard", _status_frame=lambda: SNAPSHOT))
+        publish(monitor)
+        await monitor.run()
+    asyncio.run(main())
+
+
+def test_pipeline_status_keeps_dict_access(tmp_path):
+    orch = Orchestrator(project_root=str(tmp_path))
+    coder = orch.pipeline_status["coder"]
+    assert coder["status"] == "waiting"
+    assert dict(coder) == {"status": "waiting", "progress": None, "error": None}
+
+    coder["status"] = "running"
+    assert coder.status == "running"
+    assert coder.get("progress", "n/a") is None
+    assert coder.get("missing", "n/a") == "n/a"
+    with pytest.raises(KeyError):
+        StageStatus()["missing"]
+
+
+def test_unreadable_issues_dir_fails_each_task(tmp_path):
+    (tmp_path / "issues").write_text("not a directory")
+    orch = Orchestrator(project_root=str(tmp_path))
+    assert orch.reload_issues() == frozenset()
+    assert asyncio.run(orch.run_pipeline("demo")) is False
+
+
+def test_orchestrator_results_align_with_tasks(tmp_path, instant_stages):
+    (tmp_path / "issues").mkdir()
+    for task in ("a", "c"):
+        (tmp_path / "issues" / f"{task}.md").write_text("# Title\n")
+
+    orch = Orchestrator(project_root=str(tmp_path))
+    assert asyncio.run(orch.run_pipelines(["c", "missing", "a"])) == [True, False, True]
+    assert orch.task_status["a"]["reporter"].status == "completed"
+
+
+def test_monitor_drops_oldest_events_when_full(sockets):
+    sockets.queued.append(FakeWebSocket())
+
+    def publish(monitor):
+        for event in range(EVENT_QUEUE_SIZE + 2):
+            monitor.publish(event)
+        monitor.stop()
+
+    run_monitor(publish)
+    # stop() itself takes a slot, so three of the oldest events are gone
+    batch, snapshot = sockets.opened[0].sent
+    assert batch["events"] == list(range(3, EVENT_QUEUE_SIZE + 2))
+    assert snapshot == SNAPSHOT
+
+
+def test_monitor_coalesces_queued_events_and_snapshots_on_stop(sockets):
+    sockets.queued.append(FakeWebSocket())
+
+    def publish(monitor):
+        for event in ("a", "b", "c"):
+            monitor.publish(event)
+        monitor.stop()
+
+    run_monitor(publish)
+    websocket, = sockets.opened
+    assert websocket.sent == [{"type": "batch", "events": ["a", "b", "c"]}, SNAPSHOT]
+    assert websocket.closed
+
+
+def test_monitor_reconnects_after_failed_push(sockets):
+    sockets.queued.extend([FakeWebSocket(fail=True), FakeWebSocket()])
+
+    def publish(monitor):
+        monitor.publish("a")
+        monitor.stop()
+
+    run_monitor(publish)
+    # The batch is lost with the first connection; the final snapshot opens a new one
+    failed, reconnected = sockets.opened
+    assert failed.closed and failed.sent == []
+    assert reconnected.sent == [SNAPSHOT]
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from src.maestro.pipeline import PipelineBuilder
+
+
+async def double(x):
+    await asyncio.sleep(0)
+    if x < 0:
+        raise ValueError(f"negative: {x}")
+    return x * 2
+
+
+def test_results_follow_source_order():
+    pipeline = PipelineBuilder(queue_size=1).add_source(range(8)).pipe(double, concurrency=3).pipe(double).build()
+    assert asyncio.run(pipeline.run()) == [x * 4 for x in range(8)]
+
+
+def test_failed_item_is_dropped_and_reported():
+    pipeline = PipelineBuilder().add_source([1, -1, 2]).pipe(double, concurrency=2).pipe(double).build()
+    results = asyncio.run(pipeline.run())
+    assert results[0] == 4 and results[2] == 8
+    assert isinstance(results[1], ValueError)
+
+
+def test_stages_overlap():
+    active = {"now": 0, "peak": 0}
+
+    async def tracked(x):
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+        return x
+
+    pipeline = PipelineBuilder().add_source(range(4)).pipe(tracked).pipe(tracked).build()
+    assert asyncio.run(pipeline.run()) == [0, 1, 2, 3]
+    assert active["peak"] == 2
+
+
+def test_builder_requires_source_and_valid_concurrency():
+    with pytest.raises(ValueError):
+        PipelineBuilder().pipe(double).build()
+    with pytest.raises(ValueError):
+        PipelineBuilder().pipe(double, concurrency=0)
+
+
+def test_results_keep_input_order_when_items_finish_out_of_order():
+    async def delayed(x):
+        await asyncio.sleep(0.01 * (5 - x))
+        return x
+
+    pipeline = PipelineBuilder().add_source(range(5)).pipe(delayed, concurrency=5).build()
+    assert asyncio.run(pipeline.run()) == [0, 1, 2, 3, 4]
+
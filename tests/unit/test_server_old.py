@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from dashboard import server_old
+from dashboard.server_old import OrchestratorMonitor
+
+
+def test_tail_replaces_partial_last_line_once_it_grows(tmp_path):
+    monitor = OrchestratorMonitor(project_root=str(tmp_path))
+    log_file = tmp_path / "logs" / "demo.test.log"
+    log_file.parent.mkdir()
+    log_file.write_bytes(b"collecting\n5 passed")
+
+    assert monitor.read_log_file("demo", "test") == ["collecting\n", "5 passed"]
+    assert monitor.read_log_file("demo", "test") == ["collecting\n", "5 passed"]
+
+    # The writer resumes: the partial line is replaced, not duplicated
+    with open(log_file, "ab") as f:
+        f.write(b" in 0.01s\ndone\n")
+    assert monitor.read_log_file("demo", "test") == [
+        "collecting\n", "5 passed in 0.01s\n", "done\n"
+    ]
+
+
+@pytest.mark.parametrize("observer", [
+    pytest.param(server_old.Observer, id="watchdog",
+                 marks=pytest.mark.skipif(server_old.Observer is None, reason="watchdog not installed")),
+    pytest.param(None, id="polling"),
+])
+def test_monitor_pushes_unterminated_last_line(tmp_path, monkeypatch, observer):
+    monkeypatch.setattr(server_old, "Observer", observer)
+    updates = []
+
+    async def update_node_status(self, node, status, progress=None, error=None):
+        updates.append((node, status))
+
+    monkeypatch.setattr(OrchestratorMonitor, "update_node_status", update_node_status)
+    (tmp_path / "logs").mkdir()
+    # The writer's last line has no trailing newline and nothing follows it
+    (tmp_path / "logs" / "demo.plan.log").write_bytes(b"Starting planning\nPlanning completed")
+
+    async def main():
+        monitor = OrchestratorMonitor(project_root=str(tmp_path))
+        task = asyncio.ensure_future(monitor.monitor_orchestrator())
+        try:
+            for _ in range(100):
+                if ("plan", "completed") in updates:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    asyncio.run(main())
+    assert updates == [("plan", "completed")]
@@ -4,12 +4,8 @@ import sys
 import os
 import json
 from pathlib import Path
-import shutil
 
-# Add orchestrator to path to import the script
-sys.path.append(str(Path(__file__).parent.parent.parent / "orchestrator"))
-
-# Now import the functions from the script
+# orchestrator/ is put on sys.path by tests/conftest.py
 from write_qa import (
     extract_coverage,
     extract_test_results,
@@ -17,7 +13,9 @@ from write_qa import (
     extract_type_errors,
     determine_status,
     generate_next_actions,
+    parse_outputs,
     main as write_qa_main,
+    SUMMARY_TAIL_CHARS,
 )
 
 # --- Mock Data ---
@@ -69,40 +67,71 @@ Found 1 error in 1 file (checked 1 source file)
 
 # --- Unit Tests for Helper Functions ---
 
-def test_extract_coverage():
-    assert extract_coverage(MOCK_PYTEST_PASS_OUTPUT) == 90.0
-    assert extract_coverage(MOCK_PYTEST_FAIL_OUTPUT) == 60.0
-    assert extract_coverage("No coverage info here") == 0.0
-    assert extract_coverage("") == 0.0
-
-def test_extract_test_results():
-    pass_results = extract_test_results(MOCK_PYTEST_PASS_OUTPUT)
-    assert pass_results["passed"] == 5
-    assert pass_results["failed"] == 0
-
-    fail_results = extract_test_results(MOCK_PYTEST_FAIL_OUTPUT)
-    assert fail_results["passed"] == 4
-    assert fail_results["failed"] == 1
-
-    empty_results = extract_test_results("")
-    assert empty_results["passed"] == 0
-    assert empty_results["failed"] == 0
-
-def test_extract_lint_errors():
-    assert extract_lint_errors(MOCK_LINT_ERROR_OUTPUT) == 2
-    assert extract_lint_errors("Looks good!") == 0
-    assert extract_lint_errors("") == 0
-
-def test_extract_type_errors():
-    assert extract_type_errors(MOCK_TYPE_ERROR_OUTPUT) == 2
-    assert extract_type_errors("Success: no issues found") == 0
-    assert extract_type_errors("") == 0
-
-def test_determine_status():
-    assert determine_status("0", "0", "0") == "pass"
-    assert determine_status("0", "0", "1") == "soft-fail"
-    assert determine_status("1", "0", "1") == "fail"
-    assert determine_status("1", "1", "1") == "fail"
+@pytest.mark.parametrize("output,expected", [
+    (MOCK_PYTEST_PASS_OUTPUT, 90.0),
+    (MOCK_PYTEST_FAIL_OUTPUT, 60.0),
+    ("No coverage info here", 0.0),
+    ("", 0.0),
+])
+def test_extract_coverage(output, expected):
+    assert extract_coverage(output) == expected
+
+@pytest.mark.parametrize("output,passed,failed", [
+    (MOCK_PYTEST_PASS_OUTPUT, 5, 0),
+    (MOCK_PYTEST_FAIL_OUTPUT, 4, 1),
+    ("", 0, 0),
+])
+def test_extract_test_results(output, passed, failed):
+    results = extract_test_results(output)
+    assert results["passed"] == passed
+    assert results["failed"] == failed
+
+def test_extract_test_results_summary_straddles_tail_cut():
+    summary = "======== 123 passed in 0.10s ========\n"
+    # A janela final começaria entre o "1" e o "23"
+    filler = "." * (SUMMARY_TAIL_CHARS - len(summary) + summary.index("23"))
+    output = "collected 123 items\n" + summary + filler
+    assert len(output) - SUMMARY_TAIL_CHARS == output.index("23 passed")
+    assert extract_test_results(output)["passed"] == 123
+
+def test_parse_outputs_matches_extractors():
+    metrics = parse_outputs(MOCK_PYTEST_FAIL_OUTPUT, MOCK_LINT_ERROR_OUTPUT, MOCK_TYPE_ERROR_OUTPUT)
+    assert metrics == {
+        "coverage": extract_coverage(MOCK_PYTEST_FAIL_OUTPUT),
+        "test_results": extract_test_results(MOCK_PYTEST_FAIL_OUTPUT),
+        "lint_errors": 2,
+        "type_errors": 2,
+    }
+    assert metrics["test_results"]["failed"] == 1
+
+@pytest.mark.parametrize("output,expected", [
+    (MOCK_LINT_ERROR_OUTPUT, 2),
+    ("Looks good!", 0),
+    ("", 0),
+])
+def test_extract_lint_errors(output, expected):
+    assert extract_lint_errors(output) == expected
+
+@pytest.mark.parametrize("output,expected", [
+    (MOCK_TYPE_ERROR_OUTPUT, 2),
+    ("Success: no issues found", 0),
+    ("", 0),
+])
+def test_extract_type_errors(output, expected):
+    assert extract_type_errors(output) == expected
+
+@pytest.mark.parametrize("lint_rc,types_rc,tests_rc,expected", [
+    ("0", "0", "0", "pass"),
+    ("0", "0", "1", "soft-fail"),
+    ("1", "0", "1", "fail"),
+    ("1", "1", "1", "fail"),
+    # Return codes parsed by argparse (type=int)
+    (0, 0, 0, "pass"),
+    (0, 0, 2, "soft-fail"),
+    (0, 1, 0, "fail"),
+])
+def test_determine_status(lint_rc, types_rc, tests_rc, expected):
+    assert determine_status(lint_rc, types_rc, tests_rc) == expected
 
 def test_generate_next_actions():
     actions = generate_next_actions("1", "1", "1", "unused import", "incompatible types", "assertion error")
@@ -116,18 +145,15 @@ def test_generate_next_actions():
 
 # --- Integration Test for main() ---
 
-@pytest.fixture
-def setup_test_environment(tmp_path):
-    """Set up a temporary directory for testing main script."""
+@pytest.fixture(scope="module")
+def setup_test_environment(tmp_path_factory):
+    """Set up a temporary directory for testing main script, shared by the module."""
     original_cwd = Path.cwd()
     # Create a temporary structure similar to the real project
-    test_dir = tmp_path / "maestro_test"
+    test_dir = tmp_path_factory.mktemp("maestro_test")
+    # write_qa is already imported above; main() only needs reports/ in the cwd
     (test_dir / "reports").mkdir(parents=True)
-    (test_dir / "orchestrator").mkdir()
     os.chdir(test_dir)
-    
-    # Copy the script to the temp orchestrator
-    shutil.copy(original_cwd / "orchestrator" / "write_qa.py", test_dir / "orchestrator" / "write_qa.py")
 
     yield test_dir
 
@@ -138,6 +164,8 @@ def setup_test_environment(tmp_path):
 def test_main_function_pass_scenario(setup_test_environment):
     """Test the main function with a successful scenario."""
     task_id = "test_pass"
+    # The directory is shared; drop the report left by a previous test
+    (Path("reports") / "qa.json").unlink(missing_ok=True)
     
     # Mock sys.argv
     sys.argv = [
@@ -172,6 +200,8 @@ def test_main_function_pass_scenario(setup_test_environment):
 def test_main_function_fail_scenario(setup_test_environment):
     """Test the main function with a failure scenario."""
     task_id = "test_fail"
+    # The directory is shared; drop the report left by a previous test
+    (Path("reports") / "qa.json").unlink(missing_ok=True)
     
     # Mock sys.argv
     sys.argv = [